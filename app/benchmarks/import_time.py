@@ -0,0 +1,80 @@
+from __future__ import annotations
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+# アプリケーションのディレクトリ (main.pyがあるディレクトリ)
+APP_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 起動時に読み込むモジュール
+TARGET_MODULE: str = 'src.app'
+
+# 読み込み時間を個別に表示するモジュール (起動時に読み込まれない場合は表示しない)
+REPORTED_MODULES: tuple[str, ...] = (
+    'src.app',
+    'customtkinter',
+    'PIL',
+    'keyring',
+    'certifi',
+    'slack_sdk',
+    'smartcard',
+    'src.utils.db',
+    'src.utils.slack',
+    'src.utils.nfc',
+    'src.components.views._main',
+    'src.components.views._register_user',
+    'src.components.views._register_tokens',
+    'src.components.views._enter_exit_log'
+)
+
+# 計測の繰り返し回数
+DEFAULT_REPEAT: int = 5
+
+# python -X importtimeの出力から, モジュールごとの読み込み時間 (累計, マイクロ秒) を取得する
+def parse_import_time(output: str) -> dict[str, int]:
+    times: dict[str, int] = dict[str, int]()
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times.setdefault(name.strip(), int(cumulative))
+    return times
+
+# 新しいPythonプロセスでモジュールを読み込み, モジュールごとの読み込み時間を計測する
+def measure_import_time(app_dir: str, module: str = TARGET_MODULE) -> dict[str, int]:
+    result: subprocess.CompletedProcess[str] = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=app_dir,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return parse_import_time(result.stderr)
+
+# 複数回計測し, モジュールごとの中央値を求める (1回目はファイルキャッシュの影響があるため捨てる)
+def benchmark_import_time(app_dir: str, repeat: int = DEFAULT_REPEAT, module: str = TARGET_MODULE) -> dict[str, float]:
+    measure_import_time(app_dir, module)
+    samples: list[dict[str, int]] = [measure_import_time(app_dir, module) for _ in range(repeat)]
+    return {
+        name: statistics.median(sample.get(name, 0) for sample in samples)
+        for name in samples[0].keys()
+    }
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='ImInの起動時のモジュールの読み込み時間を計測します.')
+    parser.add_argument('--app-dir', default=APP_DIR, help='計測するアプリケーションのディレクトリ (比較用に別のチェックアウトを指定できます)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='計測の繰り返し回数')
+    args: argparse.Namespace = parser.parse_args()
+
+    times: dict[str, float] = benchmark_import_time(args.app_dir, args.repeat)
+    print(f'{"module":<40} {"cumulative (ms)":>16}')
+    for name in REPORTED_MODULES:
+        if name in times:
+            print(f'{name:<40} {times[name] / 1000:>16.1f}')
+        else:
+            print(f'{name:<40} {"(not imported)":>16}')
+
+if __name__ == '__main__':
+    main()
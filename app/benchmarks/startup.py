@@ -0,0 +1,233 @@
+from __future__ import annotations
+from typing import Any
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from import_time import APP_DIR, REPORTED_MODULES, benchmark_import_time
+
+# ImInの起動時間のベンチマーク
+# 起動から最初のウィンドウの表示までの時間, モジュールごとの読み込み時間, キーリングの読み取り時間, MainViewの作成時間を計測し,
+# 保存したベースラインと比較して閾値以上に遅くなった場合は終了コード1で終了する
+# --checkを指定した場合 (CI環境変数が設定されている場合も同様) は, ベースラインがない場合も終了コード1で終了する
+# ディスプレイのない環境では, Xvfb上で実行する (例: xvfb-run -a python benchmarks/startup.py)
+
+# ベースラインのファイル
+BASELINE_PATH: str = f'{APP_DIR}/benchmarks/startup_baseline.json'
+
+# ベンチマークで使うキーリングのサービス名 (実際のトークンに影響しないため)
+BENCHMARK_SERVICE: str = 'ImIn-Benchmark'
+
+# ベンチマークで使うSlack APIのURL (ダミーのトークンでSlackと通信しないため, 接続できないURLを指定する)
+BENCHMARK_SLACK_API_BASE_URL: str = 'http://127.0.0.1:9/api/'
+
+# CIで実行されていることを表す環境変数 (設定されている場合は--checkを指定したものとして扱う)
+CI_ENV: str = 'CI'
+
+# 計測の繰り返し回数
+DEFAULT_REPEAT: int = 5
+
+# ベースラインから遅くなったと判定する割合 (0.2の場合は20%以上遅くなった場合)
+DEFAULT_THRESHOLD: float = 0.2
+
+# 遅くなったと判定する最小の差 (ミリ秒, 短い計測値の誤差で失敗しないため)
+MIN_REGRESSION_MS: float = 10.0
+
+# 最初のウィンドウの表示を待機する最大時間 (秒)
+FIRST_FRAME_TIMEOUT: float = 30.0
+
+# メモリ上にトークンを保持するキーリング (キーリングを使えない環境で, 最初のウィンドウの表示までを計測するため)
+def _use_memory_keyring() -> None:
+    import keyring
+    from keyring.backend import KeyringBackend
+
+    class MemoryKeyring(KeyringBackend):
+        priority: float = 1
+        _passwords: dict[tuple[str, str], str] = dict[tuple[str, str], str]()
+        def get_password(self, service: str, username: str) -> str | None:
+            return self._passwords.get((service, username))
+        def set_password(self, service: str, username: str, password: str) -> None:
+            self._passwords[(service, username)] = password
+        def delete_password(self, service: str, username: str) -> None:
+            self._passwords.pop((service, username), None)
+    keyring.set_keyring(MemoryKeyring())
+
+# 子プロセスで1回起動し, 計測値をJSONで標準出力に出力する
+def run_child(screen: str, memory_keyring: bool) -> None:
+    sys.path.insert(0, APP_DIR)
+    if memory_keyring:
+        _use_memory_keyring()
+
+    # モジュールの読み込み (main.pyと同じ)
+    import_start: float = time.perf_counter()
+    import keyring
+    import customtkinter as ctk
+    from src.app import App
+    from src.core import set_service
+    from src.components.views import MainView
+    from src.utils.slack import SlackTokens, SlackCredentialStore
+    from src.utils._identity import UID_HASH_KEY_NAME
+    import_ms: float = (time.perf_counter() - import_start) * 1000
+    set_service(BENCHMARK_SERVICE)
+
+    # メインウィンドウを表示する場合はダミーのトークンを登録する (登録されていない場合はセットアップウィンドウを表示する)
+    if screen == 'main':
+        for token in SlackTokens:
+            keyring.set_password(BENCHMARK_SERVICE, token.name, f'benchmark-{token.name.lower()}')
+
+    try:
+        # キーリングの読み取り時間 (起動時のトークンの確認と同じく, 全てのトークンを読み取る)
+        keyring_start: float = time.perf_counter()
+        SlackCredentialStore().get()
+        keyring_ms: float = (time.perf_counter() - keyring_start) * 1000
+
+        # MainViewの作成時間
+        main_view_ms: list[float] = list[float]()
+        original_init = MainView.__init__
+        def _timed_init(self: MainView, *args: Any, **kwargs: Any) -> None:
+            start: float = time.perf_counter()
+            original_init(self, *args, **kwargs)
+            main_view_ms.append((time.perf_counter() - start) * 1000)
+        MainView.__init__ = _timed_init
+
+        # アプリケーションを起動し, 最初のウィンドウが表示されるまでイベントを処理する
+        ctk.set_appearance_mode('Dark')
+        ctk.set_default_color_theme(f'{APP_DIR}/color.json')
+        app: App = App(root_dir=APP_DIR)
+        deadline: float = time.monotonic() + FIRST_FRAME_TIMEOUT
+        while not (app.winfo_viewable() or any(child.winfo_viewable() for child in app.winfo_children() if isinstance(child, ctk.CTkToplevel))):
+            if time.monotonic() > deadline:
+                raise TimeoutError('最初のウィンドウが表示されませんでした.')
+            app.update()
+        app.update_idletasks()
+        first_frame_time: float = time.time()
+        app.destroy()
+
+    # ベンチマーク用のサービスに保存したトークンと, 起動時に生成されたUIDのハッシュ化の秘密鍵を削除する (実際のキーリングに残さないため)
+    finally:
+        names: list[str] = [token.name for token in SlackTokens] if screen == 'main' else list[str]()
+        for name in names + [UID_HASH_KEY_NAME]:
+            try:
+                keyring.delete_password(BENCHMARK_SERVICE, name)
+            except Exception as e:
+                pass
+
+    print(json.dumps({
+        'first_frame_time': first_frame_time,
+        'import_ms': import_ms,
+        'keyring_lookup_ms': keyring_ms,
+        'main_view_ms': main_view_ms[0] if len(main_view_ms) > 0 else None
+    }))
+
+# 子プロセスで1回起動し, 計測値を取得する (起動から最初のウィンドウの表示までの時間は, 子プロセスの起動前からの時間とする)
+def measure_startup(screen: str, memory_keyring: bool) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as data_dir:
+        env: dict[str, str] = {
+            **os.environ,
+            'IMIN_DATA_DIR': data_dir,
+            'SLACK_API_BASE_URL': BENCHMARK_SLACK_API_BASE_URL
+        }
+        command: list[str] = [sys.executable, os.path.abspath(__file__), '--child', '--screen', screen]
+        if memory_keyring:
+            command.append('--memory-keyring')
+        start_time: float = time.time()
+        result: subprocess.CompletedProcess[str] = subprocess.run(command, cwd=APP_DIR, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f'起動の計測に失敗しました.\n{result.stderr}')
+        child: dict[str, float] = json.loads(result.stdout.strip().splitlines()[-1])
+    metrics: dict[str, float] = {
+        'time_to_first_frame_ms': (child['first_frame_time'] - start_time) * 1000,
+        'app_import_ms': child['import_ms'],
+        'keyring_lookup_ms': child['keyring_lookup_ms']
+    }
+    if child['main_view_ms'] is not None:
+        metrics['main_view_ms'] = child['main_view_ms']
+    return metrics
+
+# 全ての計測値を複数回計測し, 中央値を求める
+def benchmark_startup(repeat: int, screen: str, memory_keyring: bool, skip_gui: bool) -> dict[str, float]:
+    metrics: dict[str, float] = dict[str, float]()
+
+    # モジュールごとの読み込み時間 (python -X importtime)
+    import_times: dict[str, float] = benchmark_import_time(APP_DIR, repeat)
+    for name in REPORTED_MODULES:
+        if name in import_times:
+            metrics[f'import_ms:{name}'] = import_times[name] / 1000
+
+    # 起動から最初のウィンドウの表示まで (ディスプレイが必要)
+    if not skip_gui:
+        measure_startup(screen, memory_keyring) # 1回目はファイルキャッシュの影響があるため捨てる
+        samples: list[dict[str, float]] = [measure_startup(screen, memory_keyring) for _ in range(repeat)]
+        for name in samples[0].keys():
+            metrics[name] = statistics.median(sample[name] for sample in samples if name in sample)
+    return metrics
+
+# ベースラインと比較し, 閾値以上に遅くなった計測値の一覧を返す (ベースラインにない計測値は比較しない)
+def find_regressions(metrics: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    regressions: list[str] = list[str]()
+    for name, value in metrics.items():
+        if name not in baseline:
+            continue
+        base: float = baseline[name]
+        if value - base >= MIN_REGRESSION_MS and value > base * (1 + threshold):
+            regressions.append(f'{name}: {base:.1f} ms -> {value:.1f} ms (+{(value / base - 1) * 100:.0f}%)')
+    return regressions
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='ImInの起動時間を計測し, ベースラインと比較します.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='計測の繰り返し回数')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='遅くなったと判定する割合 (0.2の場合は20%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='ベースラインのファイル')
+    parser.add_argument('--update-baseline', action='store_true', help='計測値をベースラインとして保存する')
+    parser.add_argument('--screen', choices=('main', 'setup'), default='main', help='計測する最初のウィンドウ (main: メインウィンドウ, setup: セットアップウィンドウ)')
+    parser.add_argument('--memory-keyring', action='store_true', help='OSのキーリングの代わりにメモリ上のキーリングを使う (キーリングを使えない環境向け)')
+    parser.add_argument('--skip-gui', action='store_true', help='ウィンドウを表示する計測を行わない (ディスプレイのない環境向け)')
+    parser.add_argument('--check', action='store_true', help=f'ベースラインがない場合も失敗とする (環境変数{CI_ENV}が設定されている場合は常に有効)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.child:
+        run_child(args.screen, args.memory_keyring)
+        return
+
+    metrics: dict[str, float] = benchmark_startup(args.repeat, args.screen, args.memory_keyring, args.skip_gui)
+    print(f'{"metric":<48} {"median (ms)":>12}')
+    for name, value in metrics.items():
+        print(f'{name:<48} {value:>12.1f}')
+
+    # ベースラインとして保存する
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'metrics': metrics
+            }, f, indent=4)
+            f.write('\n')
+        print(f'ベースラインを保存しました: {args.baseline}')
+        return
+
+    # ベースラインと比較する
+    # ベースラインがない場合は比較できないため, --checkを指定した場合やCIでは失敗とする (比較せずに通過させないため)
+    if not os.path.exists(args.baseline):
+        print(f'ベースラインがありません. 基準となる環境で --update-baseline を指定して作成してください: {args.baseline}')
+        if args.check or os.environ.get(CI_ENV, '') not in ('', '0', 'false'):
+            sys.exit(1)
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline: dict[str, float] = json.load(f)['metrics']
+    regressions: list[str] = find_regressions(metrics, baseline, args.threshold)
+    if len(regressions) > 0:
+        print('起動時間がベースラインより遅くなっています:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+    print('起動時間はベースラインの範囲内です.')
+
+if __name__ == '__main__':
+    main()
@@ -1 +1 @@
-DELETE FROM users WHERE id=:id
\ No newline at end of file
+DELETE FROM users WHERE id=:id;
\ No newline at end of file
@@ -0,0 +1 @@
+UPDATE users SET state=CASE state WHEN :in_state THEN :out_state ELSE :in_state END, updated_at=:updated_at WHERE id=:id;
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT INTO events (user_id, action, reader, created_at)
+VALUES (:user_id, :action, :reader, :created_at);
\ No newline at end of file
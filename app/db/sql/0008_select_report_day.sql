@@ -0,0 +1 @@
+SELECT * FROM report_days WHERE day=:day;
\ No newline at end of file
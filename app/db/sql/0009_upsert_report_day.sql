@@ -0,0 +1,3 @@
+INSERT INTO report_days (day, is_closed, created_at)
+VALUES (:day, :is_closed, :created_at)
+ON CONFLICT (day) DO UPDATE SET is_closed=excluded.is_closed, created_at=excluded.created_at;
\ No newline at end of file
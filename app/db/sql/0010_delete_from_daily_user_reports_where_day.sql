@@ -0,0 +1 @@
+DELETE FROM daily_user_reports WHERE day=:day;
\ No newline at end of file
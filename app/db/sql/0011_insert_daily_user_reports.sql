@@ -0,0 +1,17 @@
+INSERT INTO daily_user_reports (day, user_id, total_seconds, first_in, last_out)
+WITH ordered AS (
+    SELECT user_id, action, created_at,
+           LEAD(created_at) OVER (PARTITION BY user_id ORDER BY created_at, id) AS next_at
+    FROM events
+    WHERE created_at >= :window_start AND created_at < :day_end
+)
+SELECT :day,
+       user_id,
+       ROUND(SUM(CASE WHEN action=:enter AND COALESCE(next_at, :day_end) > :day_start
+                      THEN (julianday(MIN(COALESCE(next_at, :day_end), :day_end)) - julianday(MAX(created_at, :day_start))) * 86400.0
+                      ELSE 0 END), 3) AS total_seconds,
+       MIN(CASE WHEN action=:enter AND created_at >= :day_start THEN created_at END) AS first_in,
+       MAX(CASE WHEN action=:exit AND created_at >= :day_start THEN created_at END) AS last_out
+FROM ordered
+GROUP BY user_id
+HAVING total_seconds > 0 OR first_in IS NOT NULL OR last_out IS NOT NULL;
\ No newline at end of file
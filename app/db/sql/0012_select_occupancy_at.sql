@@ -0,0 +1,3 @@
+SELECT COUNT(*) FROM (
+    SELECT action, MAX(created_at) FROM events WHERE created_at < :at GROUP BY user_id
+) WHERE action=:enter;
\ No newline at end of file
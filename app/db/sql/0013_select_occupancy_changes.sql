@@ -0,0 +1,5 @@
+SELECT created_at,
+       CASE WHEN action=:enter THEN 1 ELSE -1 END AS step
+FROM events
+WHERE created_at >= :day_start AND created_at < :day_end
+ORDER BY created_at, id;
\ No newline at end of file
@@ -0,0 +1 @@
+DELETE FROM hourly_occupancy_reports WHERE day=:day;
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT INTO hourly_occupancy_reports (hour, day, peak)
+VALUES (:hour, :day, :peak);
\ No newline at end of file
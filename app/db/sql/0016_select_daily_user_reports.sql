@@ -0,0 +1,4 @@
+SELECT r.day, r.user_id, u.name, r.total_seconds, r.first_in, r.last_out
+FROM daily_user_reports r LEFT JOIN users u ON u.id=r.user_id
+WHERE r.day >= :start AND r.day <= :end
+ORDER BY r.day, u.name;
\ No newline at end of file
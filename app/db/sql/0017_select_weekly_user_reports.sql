@@ -0,0 +1,5 @@
+SELECT strftime('%Y-W%W', r.day) AS week, r.user_id, u.name, SUM(r.total_seconds) AS total_seconds, COUNT(*) AS days
+FROM daily_user_reports r LEFT JOIN users u ON u.id=r.user_id
+WHERE r.day >= :start AND r.day <= :end
+GROUP BY week, r.user_id
+ORDER BY week, u.name;
\ No newline at end of file
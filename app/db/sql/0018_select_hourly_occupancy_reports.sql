@@ -0,0 +1,3 @@
+SELECT hour, peak FROM hourly_occupancy_reports
+WHERE day >= :start AND day <= :end
+ORDER BY hour;
\ No newline at end of file
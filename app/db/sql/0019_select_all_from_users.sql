@@ -0,0 +1 @@
+SELECT * FROM users;
\ No newline at end of file
@@ -0,0 +1 @@
+UPDATE events SET user_id=:new_id WHERE user_id=:old_id;
\ No newline at end of file
@@ -0,0 +1 @@
+UPDATE daily_user_reports SET user_id=:new_id WHERE user_id=:old_id;
\ No newline at end of file
@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS `idx_users_state_updated_at` ON `users` (`state`, `updated_at` DESC);
\ No newline at end of file
@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS `events` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` CHAR(64) NOT NULL,
+    `action` INTEGER NOT NULL,
+    `reader` TEXT,
+    `created_at` DATETIME NOT NULL
+);
+CREATE INDEX IF NOT EXISTS `idx_events_created_at` ON `events` (`created_at`);
+CREATE INDEX IF NOT EXISTS `idx_events_user_id_created_at` ON `events` (`user_id`, `created_at`);
\ No newline at end of file
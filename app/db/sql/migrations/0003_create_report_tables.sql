@@ -0,0 +1,19 @@
+CREATE TABLE IF NOT EXISTS `report_days` (
+    `day` DATE PRIMARY KEY NOT NULL,
+    `is_closed` INTEGER NOT NULL DEFAULT 0,
+    `created_at` DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS `daily_user_reports` (
+    `day` DATE NOT NULL,
+    `user_id` CHAR(64) NOT NULL,
+    `total_seconds` REAL NOT NULL DEFAULT 0,
+    `first_in` DATETIME,
+    `last_out` DATETIME,
+    PRIMARY KEY (`day`, `user_id`)
+);
+CREATE TABLE IF NOT EXISTS `hourly_occupancy_reports` (
+    `hour` DATETIME PRIMARY KEY NOT NULL,
+    `day` DATE NOT NULL,
+    `peak` INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS `idx_hourly_occupancy_reports_day` ON `hourly_occupancy_reports` (`day`);
\ No newline at end of file
@@ -0,0 +1,3 @@
+UPDATE `users` SET `id` = hash_sha256_uid(`id`);
+UPDATE `events` SET `user_id` = hash_sha256_uid(`user_id`);
+UPDATE `daily_user_reports` SET `user_id` = hash_sha256_uid(`user_id`);
\ No newline at end of file
@@ -0,0 +1,4 @@
+INSERT INTO `events` (`user_id`, `action`, `reader`, `created_at`)
+SELECT `id`, CASE WHEN `state` = '0' THEN 0 ELSE 1 END, NULL, `updated_at`
+FROM `users`
+WHERE `id` NOT IN (SELECT `user_id` FROM `events`);
\ No newline at end of file
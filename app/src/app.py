@@ -1,16 +1,27 @@
 from __future__ import annotations
 from typing import Any
+import sys
+import types
 import tomllib
+from tkinter import messagebox
 import customtkinter as ctk
 from .components.windows import SetupWindow
 from .components.views import MainView
-from .utils.slack import is_registered_slack_tokens
-from .utils.db import initialize_db
+from .core import get_service
+from .utils import bus
+from .utils.slack import is_registered_slack_tokens, start_slack_canvas_sync, stop_slack_canvas_sync, preload_slack_modules
+from .utils.db import initialize_db, close_db, load_sql_statements, get_uid_hash_key, UIDHashKeyError
 
 WIDTH_RATIO: int = 4                # アプリケーションウィンドウの幅の比率
 HEIGHT_RATIO: int = 3               # アプリケーションウィンドウの高さの比率
 RATIO_TO_MAX_SCREEN: float = 0.8    # ディスプレイに対するアプリケーションウィンドウの最大比率
 
+# 起動時に読み込まなかった時間のかかるモジュール (pyscard, slack_sdk, certifi) をワーカースレッドで読み込む
+# (最初のウィンドウの表示を待たせず, NFCリーダーやSlackを最初に使う時にも待たせないため)
+def _preload_modules() -> None:
+    from .utils import nfc
+    preload_slack_modules()
+
 class App(ctk.CTk):
     root_dir: str
     width: int
@@ -30,6 +41,34 @@ class App(ctk.CTk):
         with open(f'{self.root_dir}/pyproject.toml', 'rb') as f:
             self.pyproject = tomllib.load(f)
 
+        # SQL文の読み込み (データベースへのアクセス時にファイルを読み込まないようにするため)
+        load_sql_statements(self.root_dir)
+
+        # ユーザーのidを求める秘密鍵をキーリングから読み込む
+        # (読み込めない場合は起動を中止する. 別の鍵でユーザーを登録すると, 秘密鍵を復元した後に識別できなくなるため)
+        try:
+            get_uid_hash_key()
+        except UIDHashKeyError as e:
+            self._abort(
+                'ユーザーの識別に使用する秘密鍵をキーリングから読み込めませんでした.\n'
+                'キーリング (macOSの場合はキーチェーン) のロックを解除してから, もう一度起動してください.\n'
+                f'秘密鍵を失った場合は, バックアップからサービス名`{get_service()}`, アカウント名`UID_HASH_KEY`で復元してください.'
+            )
+
+        # データベースの初期化 (既存のデータベースにも未適用のマイグレーションを適用するため, 毎回実行)
+        # (初期化に失敗した場合は, 途中までしか移行されていないデータベースで動作させないため起動を中止する)
+        if not initialize_db(self.root_dir):
+            self._abort(
+                'データベースを初期化できませんでした.\n'
+                '他にImInが起動していないことを確認してから, もう一度起動してください.'
+            )
+
+        # イベントバスをメインループに接続 (ワーカースレッドからのイベントをメインスレッドで配信するため)
+        bus.attach(self)
+
+        # ユーザー情報の変化に応じたSlackのキャンバスの同期を開始
+        start_slack_canvas_sync(self.root_dir)
+
         # アプリケーションの設定
         self.title(self.pyproject['project']['name'])
         self.geometry(
@@ -47,9 +86,6 @@ class App(ctk.CTk):
 
         # 初回起動時のSlackトークンの確認
         if not is_registered_slack_tokens():
-            # データベースの初期化
-            initialize_db(self.root_dir)
-
             # セットアップウィンドウの表示
             SetupWindow(self)
 
@@ -64,10 +100,35 @@ class App(ctk.CTk):
                 self.focus_force()
             self.after(100, _focus)
 
+        # 時間のかかるモジュールをバックグラウンドで読み込み, 読み込み後にNFCリーダーの接続状況の監視を開始
+        bus.call_in_worker_thread(_preload_modules, callback=self._on_modules_preloaded)
+
+    # モジュールの読み込み後に, NFCリーダーの接続状況の監視を開始 (各ビューは接続・切断の通知を購読する)
+    def _on_modules_preloaded(self, result: None) -> None:
+        from .utils.nfc import start_reader_monitor
+        start_reader_monitor()
+
+    # 起動を中止する (コンソールのない環境でも原因が分かるようにエラーをダイアログで表示し, 終了コード1で終了する)
+    def _abort(self, message: str) -> None:
+        messagebox.showerror(title=self.pyproject['project']['name'], message=message, parent=self)
+        self.destroy()
+        sys.exit(1)
+
     # アプリケーションの終了
     def destroy(self) -> None:
+        # Slackのキャンバスの同期とNFCリーダーの監視を停止し, イベントバスをメインループから切断
+        # (NFCのモジュールが読み込まれる前に終了した場合は監視も開始していないため, 終了時にpyscardを読み込まない)
+        stop_slack_canvas_sync()
+        nfc: types.ModuleType | None = sys.modules.get(f'{__package__}.utils.nfc')
+        if nfc is not None:
+            nfc.stop_reader_monitor()
+        bus.detach()
+
         super(App, self).destroy()
 
+        # データベースの接続を全て閉じる
+        close_db()
+
     # アプリケーションの実行
     def run(self) -> None:
         self.mainloop()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+import functools
+import customtkinter as ctk
+from PIL import Image
+
+# 読み込んだ画像を保持する最大数 (ファイルパスごと)
+IMAGE_CACHE_SIZE: int = 64
+
+# 画像ファイルを読み込む (ファイルパスごとに1度だけ読み込み, 以降は同じ画像を返す. 返した画像は変更しないこと)
+@functools.lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def load_image(path: str) -> Image.Image:
+    image: Image.Image = Image.open(path)
+    image.load() # 遅延読み込みをせず, この時点でファイルを読み込んで閉じる
+    return image
+
+# アイコン画像の左右に隙間を追加する (隙間はアイコンの表示サイズ基準で指定し, 元画像の解像度に合わせて変換する)
+@functools.lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def _load_padded_image(path: str, icon_width: int, left_padding: int, right_padding: int) -> Image.Image:
+    original_image: Image.Image = load_image(path)
+
+    # 隙間を追加しない場合, そのまま返す
+    if left_padding == 0 and right_padding == 0:
+        return original_image
+
+    image_left_padding: int = int(left_padding * (original_image.width / icon_width))    # 画像の左隙間の計算
+    image_right_padding: int = int(right_padding * (original_image.width / icon_width))  # 画像の右隙間の計算
+    image_padding: int = image_left_padding + image_right_padding                       # 画像全体の横幅に追加する隙間の合計
+    image: Image.Image = Image.new(original_image.mode, (original_image.width + image_padding, original_image.height), (0, 0, 0, 0))
+    image.paste(original_image, (image_left_padding, 0), mask=original_image)
+    return image
+
+# アイコン (assets/icons/{light,dark}) のCTkImageを作成する
+# (CTkImageは表示先のウィジェットのコールバック関数を保持するため, ウィジェットごとに作成する. 読み込んだ画像はキャッシュを共有する)
+def load_icon(root_dir: str, icon: str, size: tuple[int, int], left_padding: int = 0, right_padding: int = 0) -> ctk.CTkImage:
+    icon_width, icon_height = size
+    return ctk.CTkImage(
+        light_image=_load_padded_image(f'{root_dir}/assets/icons/light/{icon}', icon_width, left_padding, right_padding),
+        dark_image=_load_padded_image(f'{root_dir}/assets/icons/dark/{icon}', icon_width, left_padding, right_padding),
+        size=(icon_width + left_padding + right_padding, icon_height)
+    )
@@ -1,16 +1,39 @@
-from ._enter_exit_log import (
-    EnterExitLogView
-)
-from ._register_tokens import (
-    RegisterTokensView,
-    RegisterEntry,
-    RegisterButton
-)
-from ._register_user import (
-    RegisterUserView,
-    RegisterUserDetailView,
-    DeleteUserAlertView
-)
-from ._app_info import AppInfoView
-from ._oss_license import OSSLicenseView
-from ._main import MainView, ViewState, VIEW_STATE_DEFAULT
\ No newline at end of file
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ._enter_exit_log import (
+        EnterExitLogView
+    )
+    from ._register_tokens import (
+        RegisterTokensView,
+        RegisterEntry,
+        RegisterButton
+    )
+    from ._register_user import (
+        RegisterUserView,
+        RegisterUserDetailView,
+        DeleteUserAlertView
+    )
+    from ._app_info import AppInfoView
+    from ._oss_license import OSSLicenseView
+    from ._main import MainView, ViewState, VIEW_STATE_DEFAULT
+
+# ビューを最初に使う時にモジュールを読み込む (表示していないビューのモジュールと, その依存ライブラリを起動時に読み込まないため)
+def __getattr__(name: str) -> object:
+    if name in ('EnterExitLogView',):
+        from . import _enter_exit_log as module
+    elif name in ('RegisterTokensView', 'RegisterEntry', 'RegisterButton'):
+        from . import _register_tokens as module
+    elif name in ('RegisterUserView', 'RegisterUserDetailView', 'DeleteUserAlertView'):
+        from . import _register_user as module
+    elif name in ('AppInfoView',):
+        from . import _app_info as module
+    elif name in ('OSSLicenseView',):
+        from . import _oss_license as module
+    elif name in ('MainView', 'ViewState', 'VIEW_STATE_DEFAULT'):
+        from . import _main as module
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value: object = getattr(module, name)
+    globals()[name] = value
+    return value
@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 import customtkinter as ctk
 from PIL import Image, ImageDraw
+from .._images import load_image
 if TYPE_CHECKING:
     from ..views import MainView
 
@@ -143,7 +144,7 @@ class AppInfoView(ctk.CTkFrame):
     # アプリアイコン画像の角を丸くする
     def _round_icon_image(self, icon_path: str, corner_radius: int) -> Image.Image:
         # 元の画像を読み込む
-        raw_image: Image.Image = Image.open(icon_path).convert('RGBA')
+        raw_image: Image.Image = load_image(icon_path).convert('RGBA')
         width, height = raw_image.size
 
         # 角を丸くするためのマスクを作成
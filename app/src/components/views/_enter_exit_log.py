@@ -4,10 +4,10 @@ import datetime
 import customtkinter as ctk
 from ...utils import UserState, UserAction, USER_ACTION_LABELS
 from ...utils.nfc import UID, NFC
+from ...utils.bus import subscribe, unsubscribe, call_in_worker_thread, ReaderEvent
 from ...utils.db import (
     is_registered_user,
-    get_user_info,
-    update_user_state
+    toggle_user_state
 )
 if TYPE_CHECKING:
     from ..windows import EnterExitLogWindow
@@ -42,7 +42,7 @@ class EnterExitLogView(ctk.CTkFrame):
     width: int
     height: int
     nfc: NFC
-    id_nfc_observer: str | None = None
+    id_clear_main_label: str | None = None
     main_label: ctk.CTkLabel
     clock_label: ClockLabel
     def __init__(self, master: EnterExitLogWindow, root_dir: str, width: int, height: int) -> None:
@@ -87,14 +87,34 @@ class EnterExitLogView(ctk.CTkFrame):
         # NFCの読み取りセッションを停止
         self.nfc.stop()
 
+        # メインラベルをデフォルトの表示に戻す予定を取り消す
+        if self.id_clear_main_label is not None:
+            self.after_cancel(self.id_clear_main_label)
+            self.id_clear_main_label = None
+
         super(EnterExitLogView, self).destroy()
 
-    # NFCの接続状況を監視を開始
+    # NFCの接続状況を監視を開始 (NFCリーダーの接続・切断の通知を購読)
     def _start_observe_nfc_connection(self) -> None:
         # NFCの接続状況の監視を停止 (重複防止)
         self._stop_observe_nfc_connection()
 
-        # NFCが接続されている場合, 監視を継続
+        # 現在の接続状況を反映し, 以降は接続・切断の通知を受け取った時に反映
+        self._update_nfc_connection()
+        subscribe(ReaderEvent, self._on_reader_event, main_thread=True)
+
+    # NFCの接続状況を監視を停止
+    def _stop_observe_nfc_connection(self) -> None:
+        unsubscribe(ReaderEvent, self._on_reader_event)
+
+    # NFCリーダーが接続・切断された時に呼ばれるコールバック関数
+    def _on_reader_event(self, event: ReaderEvent) -> None:
+        if self.winfo_exists():
+            self._update_nfc_connection()
+
+    # NFCの接続状況を反映
+    def _update_nfc_connection(self) -> None:
+        # NFCが接続されている場合
         if self.nfc.is_connected():
             # NFCが接続されていなかった場合, NFCの読み取りセッションを開始
             if self.main_label.cget('text') == '' or self.main_label.cget('text') == DEFAULT_NOT_CONNECTED_TEXT:
@@ -106,56 +126,53 @@ class EnterExitLogView(ctk.CTkFrame):
             self.main_label.configure(text=DEFAULT_NOT_CONNECTED_TEXT)
             self.nfc.stop()
 
-        # NFCの接続状況の監視を継続
-        self.id_nfc_observer = self.after(100, self._start_observe_nfc_connection)
-
-    # NFCの接続状況を監視を停止
-    def _stop_observe_nfc_connection(self) -> None:
-        if self.id_nfc_observer is not None:
-            self.after_cancel(self.id_nfc_observer)
-            self.id_nfc_observer = None
-
-    # NFCタグIDを読み取った時に呼ばれるコールバック関数
+    # NFCタグIDを読み取った時に呼ばれるコールバック関数 (メインスレッドで呼ばれる)
     def callback_by_read_nfc_uid(self) -> None:
+        # UIDのハッシュ化とユーザーの状態の反転はワーカースレッドで行い, 結果をメインスレッドで表示
+        call_in_worker_thread(self._toggle_user_state, self.nfc.response.uid, self.nfc.response.reader, callback=self._show_user_action)
+
+    # ユーザーの状態を反転 (在室 <-> 不在, 読み取ったNFCリーダーを入退室イベントに記録) (ワーカースレッドで呼ばれる)
+    def _toggle_user_state(self, uid: UID, reader: str | None) -> tuple[dict[str, str] | None, bool]:
         # 読み取ったUIDをハッシュ化
-        hashed_uid: str = self.nfc.response.uid.sha256()
+        hashed_uid: str = uid.hashed()
 
-        # 登録されていないユーザーの場合
-        if not is_registered_user(root_dir=self.root_dir, id=hashed_uid):
-            self.main_label.configure(text=f'{DEFAULT_NOT_REGISTERED_TEXT}')
+        user_info: dict[str, str] | None = toggle_user_state(root_dir=self.root_dir, id=hashed_uid, reader=reader)
 
-        # 登録されているユーザーの場合
-        else:
-            # ユーザー情報を取得
-            user_info: dict[str, str] = get_user_info(root_dir=self.root_dir, id=hashed_uid)
-            user_name: str = user_info['name']
-            user_state: UserState = UserState(int(user_info['state']))
+        # 更新後のユーザー情報と, ユーザーが登録されているかどうかを返す
+        return user_info, user_info is not None or is_registered_user(root_dir=self.root_dir, id=hashed_uid)
+
+    # ユーザーの状態の反転の結果を表示 (メインスレッドで呼ばれる)
+    def _show_user_action(self, result: tuple[dict[str, str] | None, bool]) -> None:
+        # 結果を受け取る前に入退室ログビューが破棄された場合
+        if not self.winfo_exists():
+            return
+        user_info, is_registered = result
 
-            # ユーザーが在室中の場合 (アクション: 退室, ユーザー状態を不在に更新)
-            if user_state == UserState.IN:
-                user_action = UserAction.EXIT
-                user_state = UserState.OUT
+        # ユーザーの状態の更新に失敗した場合
+        if user_info is None:
+            # 登録されていないユーザーの場合
+            if not is_registered:
+                self.main_label.configure(text=f'{DEFAULT_NOT_REGISTERED_TEXT}')
 
-            # ユーザーが不在の場合 (アクション: 入室, ユーザー状態を在室中に更新)
+            # 登録されているユーザーの場合
             else:
-                user_action = UserAction.ENTER
-                user_state = UserState.IN
-
-            # ユーザーの状態を更新に失敗した場合
-            if not update_user_state(
-                root_dir=self.root_dir,
-                id=hashed_uid,
-                state=user_state
-            ):
                 self.main_label.configure(text='もう一度かざしてください')
-                self.nfc.session.clear_response()
+                self.nfc.clear_response()
 
-            # ユーザーの状態を更新に成功した場合 (正常に処理が完了した場合)
-            else:
-                # メインラベルに読み取った情報を表示
-                self.main_label.configure(text=f'{USER_ACTION_LABELS[user_action]} :   {user_name}')
+        # ユーザーの状態を更新に成功した場合 (正常に処理が完了した場合)
+        else:
+            # 更新後の状態からアクションを決定 (在室: 入室, 不在: 退室)
+            user_name: str = user_info['name']
+            user_state: UserState = UserState(int(user_info['state']))
+            user_action: UserAction = UserAction.ENTER if user_state == UserState.IN else UserAction.EXIT
+
+            # メインラベルに読み取った情報を表示
+            self.main_label.configure(text=f'{USER_ACTION_LABELS[user_action]} :   {user_name}')
 
-        # 1.0秒後にメインラベルをデフォルトの表示に戻す
+        # 1.0秒後にメインラベルをデフォルトの表示に戻す (前回の表示を戻す予定は取り消す)
+        if self.id_clear_main_label is not None:
+            self.after_cancel(self.id_clear_main_label)
         def clear_main_label() -> None:
+            self.id_clear_main_label = None
             self.main_label.configure(text=DEFAULT_MAIN_LABEL_TEXT)
-        self.after(1000, clear_main_label)
\ No newline at end of file
+        self.id_clear_main_label = self.after(1000, clear_main_label)
@@ -2,11 +2,10 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Callable
 import enum
 import customtkinter as ctk
-from PIL import Image
-from..views import RegisterUserView, RegisterTokensView, AppInfoView, OSSLicenseView
-from ..windows._enter_exit_log import EnterExitLogWindow
+from .._images import load_icon
 if TYPE_CHECKING:
     from ...app import App
+    from ..views import RegisterUserView, RegisterTokensView, AppInfoView, OSSLicenseView
 
 # メインビューの状態を定義する列挙型
 class ViewState(enum.IntEnum):
@@ -55,7 +54,7 @@ class NavigationButton(ctk.CTkButton):
             width=width,
             height=height,
             text=text,
-            image=self._load_icon_to_CTkImage(
+            image=load_icon(
                 root_dir=master.root_dir,
                 icon=icon,
                 size=(int(height / 4), int(height / 4)),
@@ -72,47 +71,6 @@ class NavigationButton(ctk.CTkButton):
         self.width = width
         self.height = height
 
-    # アイコン画像の左右に隙間を追加
-    def _load_icon_to_CTkImage(self, root_dir: str, icon: str, size: tuple[int, int], left_padding: int | None = None, right_padding: int | None = None) -> ctk.CTkImage:
-        # 隙間を追加しない場合, そのままCTkImageを返す
-        if left_padding is None and right_padding is None:
-            return ctk.CTkImage(
-                light_image=Image.open(f'{root_dir}/assets/icons/light/{icon}'),
-                dark_image=Image.open(f'{root_dir}/assets/icons/dark/{icon}'),
-                size=size
-            )
-        else:
-            if left_padding is None:
-                left_padding = 0
-            if right_padding is None:
-                right_padding = 0
-            icon_width, icon_height = size                              # アイコン画像の元のサイズ
-            icon_left_padding: int = left_padding                       # アイコン画像の左隙間
-            icon_right_padding: int = right_padding                     # アイコン画像の右隙間
-            icon_padding: int = icon_left_padding + icon_right_padding  # アイコン画像全体の横幅に追加する隙間の合計
-
-            # ライトモード用アイコン画像の読み込みと加工
-            light_image_original: Image.Image = Image.open(f'{root_dir}/assets/icons/light/{icon}')         # 元画像の読み込み
-            image_left_padding: int = int(icon_left_padding * (light_image_original.width / icon_width))    # 画像の左隙間の計算
-            image_right_padding: int = int(icon_right_padding * (light_image_original.width / icon_width))  # 画像の右隙間の計算
-            image_padding: int = image_left_padding + image_right_padding                                   # 画像全体の横幅に追加する隙間の合計
-            light_image: Image.Image = Image.new(light_image_original.mode, (light_image_original.width + image_padding, light_image_original.height), (0, 0, 0, 0))
-            light_image.paste(light_image_original, (image_left_padding, 0), mask=light_image_original)
-
-            # ダークモード用アイコン画像の読み込みと加工
-            dark_image_original: Image.Image = Image.open(f'{root_dir}/assets/icons/dark/{icon}')           # 元画像の読み込み
-            image_left_padding = int(icon_left_padding * (dark_image_original.width / icon_width))          # 画像の左隙間の計算
-            image_right_padding = int(icon_right_padding * (dark_image_original.width / icon_width))        # 画像の右隙間の計算
-            image_padding = image_left_padding + image_right_padding                                        # 画像全体の横幅に追加する隙間の合計
-            dark_image: Image.Image = Image.new(dark_image_original.mode, (light_image_original.width + image_padding, light_image_original.height), (0, 0, 0, 0))
-            dark_image.paste(dark_image_original, (image_left_padding, 0), mask=dark_image_original)
-
-            return ctk.CTkImage(
-                light_image=light_image,
-                dark_image=dark_image,
-                size=(icon_width + icon_padding, icon_height)
-            )
-
 # メインビューのサイドバーのコンポーネント
 class SideBar(ctk.CTkFrame):
     master: MainView
@@ -194,6 +152,7 @@ class MainView(ctk.CTkFrame):
                 pass
 
             elif state == ViewState.ENTER_EXIT_LOG:
+                from ..windows import EnterExitLogWindow
                 EnterExitLogWindow(
                     master=self.master,
                     width=self.master.winfo_screenwidth(),
@@ -201,6 +160,7 @@ class MainView(ctk.CTkFrame):
                 )
 
             elif state == ViewState.REGISTER_USER:
+                from ..views import RegisterUserView
                 self.bodyview = RegisterUserView(
                     master=self,
                     root_dir=self.master.root_dir,
@@ -214,6 +174,7 @@ class MainView(ctk.CTkFrame):
                 )
 
             elif state == ViewState.REGISTER_TOKENS:
+                from ..views import RegisterTokensView
                 self.bodyview = RegisterTokensView(
                     master=self,
                     root_dir=self.master.root_dir,
@@ -227,6 +188,7 @@ class MainView(ctk.CTkFrame):
                 )
 
             elif state == ViewState.APP_INFO:
+                from ..views import AppInfoView
                 self.bodyview = AppInfoView(
                     master=self,
                     root_dir=self.master.root_dir,
@@ -240,6 +202,7 @@ class MainView(ctk.CTkFrame):
                 )
 
             elif state == ViewState.OSS_LICENSE:
+                from ..views import OSSLicenseView
                 self.bodyview = OSSLicenseView(
                     master=self,
                     root_dir=self.master.root_dir,
@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 import os
 import dataclasses
 import customtkinter as ctk
-from PIL import Image
+from .._images import load_icon
 if TYPE_CHECKING:
     from . import MainView
 
@@ -80,11 +80,7 @@ class OSSLicenseDetail(ctk.CTkFrame):
             width=button_width,
             height=button_height,
             text='戻る',
-            image=ctk.CTkImage(
-                light_image=Image.open(f'{root_dir}/assets/icons/light/arrow_back_ios.png'),
-                dark_image=Image.open(f'{root_dir}/assets/icons/dark/arrow_back_ios.png'),
-                size=(font_size, font_size)
-            ),
+            image=load_icon(root_dir, 'arrow_back_ios.png', (font_size, font_size)),
             font=ctk.CTkFont(size=font_size),
             fg_color='transparent',
             bg_color='transparent',
@@ -3,12 +3,16 @@ from typing import TYPE_CHECKING, Callable
 import webbrowser
 import tkinter as tk
 import customtkinter as ctk
-from PIL import Image
-from ...utils.slack import SlackTokens, is_registered_slack_tokens, get_slack_tokens, is_valid_slack_tokens, save_slack_tokens, SLACK_BOT_TOKEN_SCOPES_DESCRIPTION, SLACK_SETUP_DOCUMENT_URL
+from .._images import load_icon
+from ...utils.bus import subscribe, unsubscribe, SlackTokensChanged
+from ...utils.slack import SlackTokens, SlackTokenValidation, is_registered_slack_tokens, get_slack_tokens, validate_slack_tokens_async, save_slack_tokens, SLACK_BOT_TOKEN_SCOPES_DESCRIPTION, SLACK_SETUP_DOCUMENT_URL
 if TYPE_CHECKING:
     from ..windows import SetupWindow
     from ..views import MainView, RegisterUserDetailView
 
+# トークンの検証のタイムアウトに加える余裕 (ミリ秒, Slackとの通信のタイムアウトより後に判定するため)
+VALIDATION_TIMEOUT_MARGIN: int = 1000
+
 # 登録用エントリーのコンポーネント
 class RegisterEntry(ctk.CTkFrame):
     master: RegisterTokensView | RegisterUserDetailView
@@ -60,19 +64,22 @@ class RegisterTokensView(ctk.CTkFrame):
     bot_token_entry: RegisterEntry
     canvas_id_entry: RegisterEntry
     register_button: RegisterButton
+    progress_bar: ctk.CTkProgressBar                    # 検証中に表示するプログレスバー
+    validation: SlackTokenValidation | None             # 実行中のトークンの検証 (検証中でない場合はNone)
+    id_validation_timeout: str | None                   # 検証のタイムアウトのafterのid
+    registered_tokens: dict[SlackTokens, str] | None    # 登録済みのトークン (登録されていない場合はNone, 変化の通知を受けて更新する)
     id: str
     def __init__(self, master: SetupWindow | MainView, root_dir: str, width: int, height: int) -> None:
         super(RegisterTokensView, self).__init__(master=master, width=width, height=height)
         self.root_dir = root_dir
         self.width = width
         self.height = height
+        self.validation = None
+        self.id_validation_timeout = None
+        self.registered_tokens = get_slack_tokens() if is_registered_slack_tokens() else None
 
         # Slackセットアップヘルプリンクの作成
-        image: ctk.CTkImage = ctk.CTkImage(
-            light_image=Image.open(f'{root_dir}/assets/icons/light/help.png'),
-            dark_image=Image.open(f'{root_dir}/assets/icons/dark/help.png'),
-            size=(int(height * 0.03), int(height * 0.03))
-        )
+        image: ctk.CTkImage = load_icon(root_dir, 'help.png', (int(height * 0.03), int(height * 0.03)))
         self.help_label = ctk.CTkLabel(
             master=self,
             text='',
@@ -99,6 +106,9 @@ class RegisterTokensView(ctk.CTkFrame):
         self.register_button = RegisterButton(master=self, width=int(width * 0.2), height=int(height * 0.1), text='登録', command=self.register_tokens)
         self.register_button.place(relx=0.95, rely=0.95, anchor=ctk.SE)
 
+        # 検証中に表示するプログレスバーを作成 (検証中のみ表示)
+        self.progress_bar = ctk.CTkProgressBar(master=self, width=int(width * 0.25), height=int(height * 0.015), mode='indeterminate')
+
         # エントリーの監視を開始
         self._observe_entries()
 
@@ -106,25 +116,76 @@ class RegisterTokensView(ctk.CTkFrame):
         self.bot_token_entry.entry.focus_set()
 
         # トークンが既に登録されている場合はエントリーに表示
-        if is_registered_slack_tokens():
-            tokens: dict[SlackTokens, str] = get_slack_tokens()
-            self.bot_token_entry.entry.insert(0, tokens[SlackTokens.SLACK_BOT_TOKEN])
-            self.canvas_id_entry.entry.insert(0, tokens[SlackTokens.SLACK_CANVAS_ID])
+        if self.registered_tokens is not None:
+            self.bot_token_entry.entry.insert(0, self.registered_tokens[SlackTokens.SLACK_BOT_TOKEN])
+            self.canvas_id_entry.entry.insert(0, self.registered_tokens[SlackTokens.SLACK_CANVAS_ID])
 
-    def register_tokens(self, event: tk.Event | None = None) -> None:
-        # エントリー監視を停止
-        self.after_cancel(self.id)
+        # トークンの変化を購読 (キーリングを監視せずに登録済みのトークンを更新するため)
+        subscribe(SlackTokensChanged, self._on_slack_tokens_changed, main_thread=True)
 
-        # 登録ボタンを無効化
-        self.register_button.configure(state=ctk.DISABLED)
-        self.register_button.update_idletasks()
+    # ビューの破棄時にトークンの検証, エントリーの監視とトークンの変化の購読を停止
+    def destroy(self) -> None:
+        self._cancel_validation()
+        self.after_cancel(self.id)
+        unsubscribe(SlackTokensChanged, self._on_slack_tokens_changed)
+        super(RegisterTokensView, self).destroy()
+
+    # トークンが保存・削除された場合, 登録済みのトークンを更新する (エントリーが編集されていない場合はエントリーの表示も更新する)
+    def _on_slack_tokens_changed(self, event: SlackTokensChanged) -> None:
+        if not self.winfo_exists():
+            return
+        old_tokens: dict[SlackTokens, str] | None = self.registered_tokens
+        self.registered_tokens = get_slack_tokens() if event.is_registered else None
+        entries: dict[SlackTokens, RegisterEntry] = {
+            SlackTokens.SLACK_BOT_TOKEN: self.bot_token_entry,
+            SlackTokens.SLACK_CANVAS_ID: self.canvas_id_entry
+        }
+        for key, entry in entries.items():
+            if entry.entry.get().strip() == (old_tokens[key] if old_tokens is not None else ''):
+                entry.entry.delete(0, ctk.END)
+                entry.entry.insert(0, self.registered_tokens[key] if self.registered_tokens is not None else '')
+
+    # トークンの検証を開始する (検証はバックグラウンドで行い, 結果は_on_validatedで受け取る)
+    def register_tokens(self, event: tk.Event | None = None) -> None:
+        # 検証中の場合は何もしない
+        if self.validation is not None:
+            return
 
         # エントリーからトークンを取得
         bot_token: str = self.bot_token_entry.entry.get().strip()
         canvas_id: str = self.canvas_id_entry.entry.get().strip()
 
+        # 登録ボタンを無効化し, 検証中の表示を開始
+        self.register_button.configure(state=ctk.DISABLED, text='検証中')
+        self.progress_bar.place(relx=0.73, rely=0.9, anchor=ctk.E)
+        self.progress_bar.start()
+
+        # トークンの検証を開始 (一定時間内に結果が返らない場合は接続できなかったとする)
+        self.validation = validate_slack_tokens_async(bot_token=bot_token, canvas_id=canvas_id, callback=self._on_validated)
+        self.id_validation_timeout = self.after(int(self.validation.timeout * 1000) + VALIDATION_TIMEOUT_MARGIN, lambda: self._on_validated(None))
+
+    # 検証をキャンセルし, 検証中の表示を終了する
+    def _cancel_validation(self) -> None:
+        if self.validation is not None:
+            self.validation.cancel()
+            self.validation = None
+        if self.id_validation_timeout is not None:
+            self.after_cancel(self.id_validation_timeout)
+            self.id_validation_timeout = None
+        self.progress_bar.stop()
+        self.progress_bar.place_forget()
+        self.register_button.configure(text='登録')
+
+    # トークンの検証結果を受け取る (有効: True, 無効: False, 接続できなかった: None)
+    def _on_validated(self, is_valid: bool | None) -> None:
+        if self.validation is None or not self.winfo_exists():
+            return
+        bot_token: str = self.validation.bot_token
+        canvas_id: str = self.validation.canvas_id
+        self._cancel_validation()
+
         # トークンの検証
-        if is_valid_slack_tokens(bot_token=bot_token, canvas_id=canvas_id):
+        if is_valid:
             # トークンの保存
             from ..windows import SetupWindow
             save_slack_tokens(tokens={
@@ -156,6 +217,7 @@ class RegisterTokensView(ctk.CTkFrame):
 
                 # エントリーに登録したトークンを表示
                 tokens: dict[SlackTokens, str] = get_slack_tokens()
+                self.registered_tokens = tokens
                 self.bot_token_entry.entry.delete(0, ctk.END)
                 self.bot_token_entry.entry.insert(0, tokens[SlackTokens.SLACK_BOT_TOKEN])
                 self.canvas_id_entry.entry.delete(0, ctk.END)
@@ -164,8 +226,15 @@ class RegisterTokensView(ctk.CTkFrame):
                 # 最初のエントリーにフォーカスを設定
                 self.bot_token_entry.entry.focus_set()
 
-                # エントリーの監視を再開
-                self._observe_entries()
+        # Slackに接続できなかった場合はエラーメッセージを表示して, 入力したトークンのまま再試行を促す
+        elif is_valid is None:
+            # エラーメッセージの表示
+            self.canvas_id_entry.description.configure(text='Slackに接続できませんでした. ネットワークを確認して再度お試しください.', text_color='red')
+
+            # 一定時間後にエラーメッセージをクリア (2秒後)
+            def _clear_connection_error_message() -> None:
+                self.canvas_id_entry.description.configure(text='', text_color=self.bot_token_entry.description.cget('text_color'))
+            self.after(2000, _clear_connection_error_message)
 
         # トークンが無効な場合はエラーメッセージを表示して, 再度トークンの入力を促す
         else:
@@ -182,26 +251,31 @@ class RegisterTokensView(ctk.CTkFrame):
             self.canvas_id_entry.entry.delete(0, ctk.END)
 
             # 既にトークンが登録されている場合はエントリーに表示
-            if is_registered_slack_tokens():
-                tokens: dict[SlackTokens, str] = get_slack_tokens()
-                self.bot_token_entry.entry.insert(0, tokens[SlackTokens.SLACK_BOT_TOKEN])
-                self.canvas_id_entry.entry.insert(0, tokens[SlackTokens.SLACK_CANVAS_ID])
+            if self.registered_tokens is not None:
+                self.bot_token_entry.entry.insert(0, self.registered_tokens[SlackTokens.SLACK_BOT_TOKEN])
+                self.canvas_id_entry.entry.insert(0, self.registered_tokens[SlackTokens.SLACK_CANVAS_ID])
 
             # 最初のエントリーにフォーカスを設定
             self.bot_token_entry.entry.focus_set()
 
-            # エントリーの監視を再開
-            self._observe_entries()
-
-    # それぞれのエントリーが空白でない場合に登録ボタンを有効化 (ループで監視)
+    # それぞれのエントリーが空白でない場合に登録ボタンを有効化 (ループで監視, 登録済みのトークンはキーリングではなく保持しているものと比較する)
+    # 検証中にエントリーが編集された場合は検証をキャンセルする
     def _observe_entries(self) -> None:
         bot_token: str = self.bot_token_entry.entry.get().strip()
         canvas_id: str = self.canvas_id_entry.entry.get().strip()
 
+        if self.validation is not None:
+            if bot_token != self.validation.bot_token or canvas_id != self.validation.canvas_id:
+                self._cancel_validation()
+            else:
+                self.register_button.configure(state=ctk.DISABLED)
+                self.id = self.after(100, self._observe_entries)
+                return
+
         if bot_token != '' and canvas_id != '':
             # 既にトークンが登録されている場合は変更がある場合のみ有効化
-            if is_registered_slack_tokens():
-                tokens: dict[SlackTokens, str] = get_slack_tokens()
+            if self.registered_tokens is not None:
+                tokens: dict[SlackTokens, str] = self.registered_tokens
                 if bot_token != tokens[SlackTokens.SLACK_BOT_TOKEN] or canvas_id != tokens[SlackTokens.SLACK_CANVAS_ID]:
                     self.register_button.configure(state=ctk.NORMAL)
                 else:
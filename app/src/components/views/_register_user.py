@@ -1,20 +1,31 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Literal
+import sys
+import math
 import tkinter as tk
 import customtkinter as ctk
-from PIL import Image
+from .._images import load_icon
 from ...utils import UserState, UserAction, DEFAULT_USER_STATE, USER_STATE_LABELS
-from ...utils.nfc import UID, NFC
+from ...utils.bus import subscribe, unsubscribe, UserEvent
 from ...utils.db import (
     is_registered_user,
     register_user,
-    update_user_state,
+    toggle_user_state,
     delete_user,
-    get_user_info,
-    get_users_by_state
+    get_users_by_state,
+    get_users_by_state_page,
+    count_users_by_state
 )
 from ..views import RegisterEntry, RegisterButton
+
+# 仮想化したユーザー一覧に切り替える登録ユーザー数 (これより多い場合は表示範囲のフレームのみを作成する)
+VIRTUALIZED_USERS_LIST_THRESHOLD: int = 50
+
+# 仮想化したユーザー一覧で, 表示範囲の前後に余分に作成するフレームの数
+VIRTUALIZED_USERS_LIST_BUFFER: int = 2
+
 if TYPE_CHECKING:
+    from ...utils.nfc import UID, NFC
     from ..views import MainView
     from ..windows import RegisterUserDetailWindow, DeleteUserAlertWindow
 
@@ -30,11 +41,7 @@ class AddNewUserButton(ctk.CTkButton):
             width=width,
             height=height,
             text='',
-            image=ctk.CTkImage(
-                light_image=Image.open(f'{root_dir}/assets/icons/light/person_add.png'),
-                dark_image=Image.open(f'{root_dir}/assets/icons/dark/person_add.png'),
-                size=(height, height)
-            ),
+            image=load_icon(root_dir, 'person_add.png', (height, height)),
             command=self.switch_to_register_user_detail_window,
             fg_color='transparent',
             bg_color='transparent',
@@ -107,7 +114,8 @@ class RegisterUserDetailView(ctk.CTkFrame):
         # 名前エントリーにフォーカスを設定
         self.user_name_entry.entry.focus_set()
 
-        # NFCの初期化とタグ読み取り開始
+        # NFCの初期化とタグ読み取り開始 (pyscardの読み込みに時間がかかるため, 起動時ではなく最初に使う時に読み込む)
+        from ...utils.nfc import NFC
         self.nfc = NFC(command=self.callback_by_read_nfc_uid, only_once=False)
         self.nfc.start()
 
@@ -139,11 +147,12 @@ class RegisterUserDetailView(ctk.CTkFrame):
         self.register_button.configure(state=ctk.DISABLED)
 
         # エントリーから値を取得
+        from ...utils.nfc import UID
         uid: UID = UID(self.nfc_uid_entry.entry.get().strip())
         user_name: str = self.user_name_entry.entry.get().strip()
 
         # ユーザー情報を登録に成功した場合
-        if register_user(root_dir=self.root_dir, id=uid.sha256(), name=user_name, state=DEFAULT_USER_STATE):
+        if register_user(root_dir=self.root_dir, id=uid.hashed(), name=user_name, state=DEFAULT_USER_STATE):
             # エントリーを無効化
             self.register_button.configure(state=ctk.DISABLED)
             self.nfc_uid_entry.entry.configure(state=ctk.DISABLED)
@@ -155,10 +164,7 @@ class RegisterUserDetailView(ctk.CTkFrame):
             def _close_window() -> None:
                 self.user_name_entry.description.configure(text='', text_color=text_color)
 
-                # ユーザーリストビューを更新
-                if isinstance(self.master.master.bodyview, RegisterUserView):
-                    self.master.master.bodyview.update_users_list()
-
+                # ユーザー一覧はユーザー追加の通知により更新されるため, ウィンドウを閉じるのみ
                 self.master.destroy()
             self.after(1000, _close_window)
 
@@ -188,7 +194,7 @@ class RegisterUserDetailView(ctk.CTkFrame):
         uid: UID = self.nfc.response.uid
 
         # NFCタグがすでに登録されている場合は警告メッセージを1秒間表示
-        if is_registered_user(self.root_dir, uid.sha256()):
+        if is_registered_user(self.root_dir, uid.hashed()):
             text_color: str = self.nfc_uid_entry.description.cget('text_color')
             self.nfc_uid_entry.description.configure(text='このNFCタグはすでに登録されています', text_color='red')
             def _clear_warning_message() -> None:
@@ -347,7 +353,7 @@ class UserInfoFrame(ctk.CTkFrame):
     width: int
     height: int
     name: str
-    hashed_uid: str                         # NFCタグIDのSHA256ハッシュ値
+    hashed_uid: str                         # NFCタグIDのハッシュ値 (秘密鍵付き)
     name_label: ctk.CTkLabel                # ユーザー名ラベル
     toggle_state_button: ctk.CTkButton      # ユーザー状態切替ボタン
     delete_button: ctk.CTkButton            # ユーザー削除ボタン
@@ -391,11 +397,7 @@ class UserInfoFrame(ctk.CTkFrame):
             width=button_width,
             height=button_height,
             text='',
-            image=ctk.CTkImage(
-                light_image=Image.open(f'{root_dir}/assets/icons/light/check_in_out.png'),
-                dark_image=Image.open(f'{root_dir}/assets/icons/dark/check_in_out.png'),
-                size=(button_height, button_height)
-            ),
+            image=load_icon(root_dir, 'check_in_out.png', (button_height, button_height)),
             command=self.toggle_user_state,
             fg_color='transparent',
             bg_color='transparent',
@@ -409,11 +411,7 @@ class UserInfoFrame(ctk.CTkFrame):
             width=button_width,
             height=button_height,
             text='',
-            image=ctk.CTkImage(
-                light_image=Image.open(f'{root_dir}/assets/icons/light/person_remove.png'),
-                dark_image=Image.open(f'{root_dir}/assets/icons/dark/person_remove.png'),
-                size=(button_height, button_height)
-            ),
+            image=load_icon(root_dir, 'person_remove.png', (button_height, button_height)),
             command=self.delete_user,
             fg_color='transparent',
             bg_color='transparent',
@@ -421,16 +419,16 @@ class UserInfoFrame(ctk.CTkFrame):
         )
         self.delete_button.place(relx=0.9, rely=0.5, anchor=ctk.CENTER)
 
-    # ユーザー状態を切り替える
+    # 表示するユーザーを変更する (フレームを作り直さずに使い回すため)
+    def set_user(self, name: str, hashed_uid: str) -> None:
+        self.hashed_uid = hashed_uid
+        if self.name != name:
+            self.name = name
+            self.name_label.configure(text=self.name)
+
+    # ユーザー状態を切り替える (ユーザー一覧は状態の変化の通知により更新される)
     def toggle_user_state(self) -> None:
-        current_state: UserState = UserState(int(get_user_info(self.root_dir, self.hashed_uid)['state']))
-        if current_state == UserState.IN:
-            new_state: UserState = UserState.OUT
-        elif current_state == UserState.OUT:
-            new_state: UserState = UserState.IN
-        if update_user_state(self.root_dir, self.hashed_uid, new_state):
-            # ユーザー一覧を更新
-            self._register_user_view.update_users_list()
+        toggle_user_state(self.root_dir, self.hashed_uid)
 
     def delete_user(self) -> None:
         from ..windows import DeleteUserAlertWindow
@@ -448,13 +446,14 @@ class UserInfoFrame(ctk.CTkFrame):
 
 # ユーザー一覧スクロールフレーム
 class UsersList(ctk.CTkScrollableFrame):
-    master: ctk.CTkCanvas                                           # CT_kScrollableFrameのmasterはCTkCanvas型になるため
-    _master: UsersTabView                                           # 親ビューの参照
+    master: ctk.CTkCanvas                       # CT_kScrollableFrameのmasterはCTkCanvas型になるため
+    _master: UsersTabView                       # 親ビューの参照
     root_dir: str
     width: int
     height: int
-    user_state: UserState                                           # ユーザー状態フィルター
-    user_info_frames: list[UserInfoFrame] = list[UserInfoFrame]()   # ユーザー情報フレームのリスト (状態の更新順)
+    user_state: UserState                       # ユーザー状態フィルター
+    user_info_frames: dict[str, UserInfoFrame]  # ユーザー情報フレームの辞書 (キー: NFCタグIDのハッシュ値)
+    user_info_order: list[str]                  # 表示中のユーザー情報フレームの並び順 (状態の更新順)
     def __init__(self, master: UsersTabView, root_dir: str, width: int, height: int, user_state: UserState = DEFAULT_USER_STATE) -> None:
         super(UsersList, self).__init__(
             master=master,
@@ -470,47 +469,221 @@ class UsersList(ctk.CTkScrollableFrame):
         self.width = width
         self.height = height
         self.user_state = user_state
+        self.user_info_frames = dict[str, UserInfoFrame]()
+        self.user_info_order = list[str]()
 
         # ユーザー一覧を初期化
         self.create_users_list()
 
     # ユーザー一覧を作成
     def create_users_list(self) -> None:
+        self.update_users_list()
+
+    # ユーザー一覧をクリア
+    def clear_users_list(self) -> None:
+        for user_info_frame in self.user_info_frames.values():
+            user_info_frame.destroy()
+        self.user_info_frames = dict[str, UserInfoFrame]()
+        self.user_info_order = list[str]()
+
+    # ユーザー一覧を更新 (現在の一覧との差分のみを反映し, フレームはできるだけ使い回す)
+    def update_users_list(self, user_state: UserState | None = None) -> None:
+        # ユーザー状態フィルターを更新 (Noneの場合は変更しない. ユーザーの状態が変わった場合などに使用)
+        if user_state is not None:
+            self.user_state = user_state
+
         users: list[dict[str, str]] = get_users_by_state(self.root_dir, self.user_state)
+        new_order: list[str] = [user['id'] for user in users]
+        new_ids: set[str] = set(new_order)
+
+        # 一覧から外れたユーザーのフレームは, 新たに表示するユーザーのために取り置く
+        spare_frames: list[UserInfoFrame] = list[UserInfoFrame]()
+        for hashed_uid in [hashed_uid for hashed_uid in self.user_info_order if hashed_uid not in new_ids]:
+            user_info_frame: UserInfoFrame = self.user_info_frames.pop(hashed_uid)
+            user_info_frame.pack_forget()
+            spare_frames.append(user_info_frame)
+        packed_order: list[str] = [hashed_uid for hashed_uid in self.user_info_order if hashed_uid in new_ids]
+
+        # 新たに表示するユーザーのフレームを用意 (取り置いたフレームがあれば使い回す)
         frame_width: int = int(self.width * 0.9)
         frame_height: int = int(self.height * 0.2)
         for user in users:
-            user_info_frame = UserInfoFrame(
-                master=self,
-                root_dir=self.root_dir,
-                width=frame_width,
-                height=frame_height,
-                name=user['name'],
-                hashed_uid=user['id']
-            )
-            user_info_frame.pack(pady=int(self.height * 0.02))
-            self.user_info_frames.append(user_info_frame)
+            if user['id'] in self.user_info_frames:
+                self.user_info_frames[user['id']].set_user(name=user['name'], hashed_uid=user['id'])
+            elif len(spare_frames) > 0:
+                user_info_frame = spare_frames.pop()
+                user_info_frame.set_user(name=user['name'], hashed_uid=user['id'])
+                self.user_info_frames[user['id']] = user_info_frame
+            else:
+                self.user_info_frames[user['id']] = UserInfoFrame(
+                    master=self,
+                    root_dir=self.root_dir,
+                    width=frame_width,
+                    height=frame_height,
+                    name=user['name'],
+                    hashed_uid=user['id']
+                )
+
+        # 使い回さなかったフレームを破棄
+        for user_info_frame in spare_frames:
+            user_info_frame.destroy()
 
-        # レイアウトを更新
-        self.update_idletasks()
+        # 並び順が異なる位置のフレームのみを配置し直す
+        for index, hashed_uid in enumerate(new_order):
+            if index < len(packed_order) and packed_order[index] == hashed_uid:
+                continue
+            if hashed_uid in packed_order:
+                packed_order.remove(hashed_uid)
+            if index < len(packed_order):
+                self.user_info_frames[hashed_uid].pack(pady=int(self.height * 0.02), before=self.user_info_frames[packed_order[index]])
+            else:
+                self.user_info_frames[hashed_uid].pack(pady=int(self.height * 0.02))
+            packed_order.insert(index, hashed_uid)
+        self.user_info_order = new_order
 
-    # ユーザー一覧をクリア
-    def clear_users_list(self) -> None:
-        for user_info_frame in self.user_info_frames:
-            user_info_frame.destroy()
+# 仮想化したユーザー一覧フレーム (表示範囲とその前後のフレームのみを作成し, スクロールに合わせて使い回す)
+class VirtualUsersList(ctk.CTkFrame):
+    master: UsersTabView
+    _master: UsersTabView                       # 親ビューの参照 (UserInfoFrameからRegisterUserViewを参照するため, UsersListと揃える)
+    root_dir: str
+    width: int
+    height: int
+    user_state: UserState                       # ユーザー状態フィルター
+    user_info_frames: list[UserInfoFrame]       # 使い回すユーザー情報フレームのリスト
+    scrollbar: ctk.CTkScrollbar                 # スクロールバー
+    frame_width: int                            # ユーザー情報フレームの幅
+    frame_height: int                           # ユーザー情報フレームの高さ
+    row_height: int                             # 1行の高さ (フレームの高さ + 上下の余白)
+    count: int                                  # 表示するユーザー数
+    scroll_top: float                           # スクロール位置 (一覧の先頭からの距離)
+    _users_page: tuple[int, list[dict[str, str]]] # 取得済みのユーザー一覧の範囲 (先頭の位置, ユーザー一覧)
+    _mouse_wheel_bindings: dict[str, str]       # マウスホイールのイベントとコールバック関数のidの辞書
+    def __init__(self, master: UsersTabView, root_dir: str, width: int, height: int, user_state: UserState = DEFAULT_USER_STATE) -> None:
+        super(VirtualUsersList, self).__init__(
+            master=master,
+            width=width,
+            height=height,
+            corner_radius=int(min(width, height) * 0.02),
+            fg_color='transparent',
+            bg_color='transparent'
+        )
+        self._master = master
+        self.root_dir = root_dir
+        self.width = width
+        self.height = height
+        self.user_state = user_state
         self.user_info_frames = list[UserInfoFrame]()
+        self.frame_width = int(self.width * 0.9)
+        self.frame_height = int(self.height * 0.2)
+        self.row_height = self.frame_height + 2 * int(self.height * 0.02)
+        self.count = 0
+        self.scroll_top = 0.0
+        self._users_page = (0, list[dict[str, str]]())
+
+        # スクロールバーの作成
+        self.scrollbar = ctk.CTkScrollbar(master=self, height=height, command=self._on_scrollbar)
+        self.scrollbar.place(relx=1.0, rely=0.0, anchor=ctk.NE)
+
+        # マウスホイールでのスクロールを設定 (Linuxの場合はButton-4, Button-5)
+        self._mouse_wheel_bindings = dict[str, str]()
+        for sequence in ['<MouseWheel>', '<Button-4>', '<Button-5>']:
+            self._mouse_wheel_bindings[sequence] = self.bind_all(sequence, self._on_mouse_wheel, add='+')
 
-    # ユーザー一覧を更新
+        # ユーザー一覧を初期化
+        self.update_users_list()
+
+    # 仮想化したユーザー一覧の破棄
+    def destroy(self) -> None:
+        # マウスホイールのイベントの登録を解除 (他のウィジェットの登録は残す)
+        for sequence, funcid in self._mouse_wheel_bindings.items():
+            script: str = self.tk.call('bind', 'all', sequence)
+            self.tk.call('bind', 'all', sequence, '\n'.join([line for line in script.split('\n') if funcid not in line]))
+            self.deletecommand(funcid)
+        self._mouse_wheel_bindings = dict[str, str]()
+
+        super(VirtualUsersList, self).destroy()
+
+    # ユーザー一覧を更新 (ユーザー数を取得し直し, 表示範囲のフレームのみを更新する)
     def update_users_list(self, user_state: UserState | None = None) -> None:
-        # ユーザー状態フィルターを更新 (Noneの場合は変更しない. ユーザーの状態が変わった場合などに使用)
-        if user_state is not None:
+        # ユーザー状態フィルターを更新し, 先頭までスクロール (Noneの場合は変更しない. ユーザーの状態が変わった場合などに使用)
+        if user_state is not None and user_state != self.user_state:
             self.user_state = user_state
+            self.scroll_top = 0.0
 
-        # 古いユーザー一覧をクリア
-        self.clear_users_list()
+        self.count = count_users_by_state(self.root_dir, self.user_state)
+        self._users_page = (0, list[dict[str, str]]())
+        self._scroll_to(self.scroll_top)
 
-        # ここにユーザー一覧を再取得して表示するコードを追加
-        self.create_users_list()
+    # 指定した位置までスクロールし, 表示範囲のフレームを配置する
+    def _scroll_to(self, scroll_top: float) -> None:
+        max_scroll_top: float = max(self.count * self.row_height - self.height, 0)
+        self.scroll_top = min(max(scroll_top, 0.0), max_scroll_top)
+
+        # 表示範囲 (前後の余分なフレームを含む) のユーザー一覧を取得
+        first: int = max(int(self.scroll_top // self.row_height) - VIRTUALIZED_USERS_LIST_BUFFER, 0)
+        last: int = min(math.ceil((self.scroll_top + self.height) / self.row_height) + VIRTUALIZED_USERS_LIST_BUFFER, self.count)
+        users: list[dict[str, str]] = self._get_users(first, last)
+
+        # 不足しているフレームを作成
+        while len(self.user_info_frames) < len(users):
+            self.user_info_frames.append(UserInfoFrame(
+                master=self,
+                root_dir=self.root_dir,
+                width=self.frame_width,
+                height=self.frame_height,
+                name='',
+                hashed_uid=''
+            ))
+
+        # フレームにユーザーを割り当てて配置 (余ったフレームは非表示)
+        x: int = int((self.width - self.scrollbar.cget('width')) / 2)
+        for index, user_info_frame in enumerate(self.user_info_frames):
+            if index < len(users):
+                user_info_frame.set_user(name=users[index]['name'], hashed_uid=users[index]['id'])
+                user_info_frame.place(x=x, y=int((first + index) * self.row_height + (self.row_height - self.frame_height) / 2 - self.scroll_top), anchor=ctk.N)
+            else:
+                user_info_frame.place_forget()
+
+        # スクロールバーの位置を更新
+        total_height: int = max(self.count * self.row_height, self.height)
+        self.scrollbar.set(self.scroll_top / total_height, (self.scroll_top + self.height) / total_height)
+
+    # 指定した範囲のユーザー一覧を取得する (取得済みの範囲であればデータベースにアクセスしない)
+    def _get_users(self, first: int, last: int) -> list[dict[str, str]]:
+        page_first, page_users = self._users_page
+        if first < page_first or last > page_first + len(page_users):
+            # 表示範囲の前後1画面分を合わせて取得する (少しのスクロールで取得し直さないため)
+            visible: int = last - first
+            page_first = max(first - visible, 0)
+            page_users = get_users_by_state_page(self.root_dir, self.user_state, offset=page_first, limit=visible * 3)
+            self._users_page = (page_first, page_users)
+        return page_users[first - page_first:last - page_first]
+
+    # スクロールバーが操作された時に呼ばれるコールバック関数
+    def _on_scrollbar(self, command: str, value: str | float, unit: str | None = None) -> None:
+        total_height: int = max(self.count * self.row_height, self.height)
+        if command == 'moveto':
+            self._scroll_to(float(value) * total_height)
+        elif command == 'scroll':
+            step: float = self.height if unit == 'pages' else self.row_height / 4
+            self._scroll_to(self.scroll_top + float(value) * step)
+
+    # マウスホイールが操作された時に呼ばれるコールバック関数 (ユーザー一覧上での操作のみ反映)
+    def _on_mouse_wheel(self, event: tk.Event) -> None:
+        # このユーザー一覧, またはその子孫のウィジェット上の場合のみスクロール
+        # (パス名の前方一致だけでは, .!virtualuserslist2 のような名前の続く兄弟ウィジェットも一致するため)
+        widget_path: str = str(event.widget)
+        if widget_path != str(self) and not widget_path.startswith(f'{self}.'):
+            return
+        if event.num == 4:
+            delta: float = -self.row_height / 2
+        elif event.num == 5:
+            delta = self.row_height / 2
+        elif sys.platform.startswith('win'):
+            delta = -event.delta / 120 * self.row_height / 2
+        else:
+            delta = -event.delta * self.row_height / 8
+        self._scroll_to(self.scroll_top + delta)
 
 # ユーザータブボタンのコンポーネント
 class TabButton(ctk.CTkButton):
@@ -598,8 +771,8 @@ class UsersTabView(ctk.CTkFrame):
     master: RegisterUserView
     root_dir: str
     width: int
-    tab_frame: TabFrame     # タブフレーム (在室者・不在者タブ)
-    users_list: UsersList   # ユーザー一覧 (現在のタブに対応)
+    tab_frame: TabFrame                         # タブフレーム (在室者・不在者タブ)
+    users_list: UsersList | VirtualUsersList    # ユーザー一覧 (現在のタブに対応)
     def __init__(self, master: RegisterUserView, root_dir: str, width: int, height: int) -> None:
         super(UsersTabView, self).__init__(
             master=master,
@@ -623,8 +796,10 @@ class UsersTabView(ctk.CTkFrame):
         )
         self.tab_frame.place(relx=0.5, rely=0.025, anchor=ctk.N)
 
-        # ユーザー一覧の作成 (初期状態は在室者タブ)
-        self.users_list = UsersList(
+        # ユーザー一覧の作成 (初期状態は在室者タブ, 登録ユーザーが多い場合は仮想化したユーザー一覧を使用)
+        users_count: int = sum([count_users_by_state(root_dir, user_state) for user_state in UserState])
+        users_list_class: type[UsersList | VirtualUsersList] = VirtualUsersList if users_count > VIRTUALIZED_USERS_LIST_THRESHOLD else UsersList
+        self.users_list = users_list_class(
             master=self,
             root_dir=root_dir,
             width=int(width * 0.9),
@@ -649,6 +824,7 @@ class RegisterUserView(ctk.CTkFrame):
     height: int
     add_new_user_button: AddNewUserButton   # 新規ユーザー追加ボタン
     users_tab_view: UsersTabView            # ユーザータブビュー
+    id_users_list_update: str | None = None # ユーザー一覧の更新のafterのid (複数の通知をまとめて1回で更新するため)
     def __init__(self, master: MainView, root_dir: str, width: int, height: int) -> None:
         super(RegisterUserView, self).__init__(master=master, width=width, height=height)
         self.root_dir = root_dir
@@ -675,6 +851,29 @@ class RegisterUserView(ctk.CTkFrame):
         )
         self.users_tab_view.place(relx=0.5, rely=0.55, anchor=ctk.CENTER)
 
+        # ユーザー情報の変化の購読を開始 (メインスレッドで通知を受け取る)
+        subscribe(UserEvent, self._on_user_event, main_thread=True)
+
+    # ユーザー登録ビューの破棄
+    def destroy(self) -> None:
+        # ユーザー情報の変化の購読を停止
+        unsubscribe(UserEvent, self._on_user_event)
+
+        # ユーザー一覧の更新をキャンセル
+        if self.id_users_list_update is not None:
+            self.after_cancel(self.id_users_list_update)
+            self.id_users_list_update = None
+
+        super(RegisterUserView, self).destroy()
+
+    # ユーザー情報が変化した時に呼ばれるコールバック関数 (アイドル時にまとめてユーザー一覧を更新)
+    def _on_user_event(self, event: UserEvent) -> None:
+        if self.id_users_list_update is None:
+            def _update_users_list() -> None:
+                self.id_users_list_update = None
+                self.update_users_list()
+            self.id_users_list_update = self.after_idle(_update_users_list)
+
     # 新規ユーザー登録詳細ウィンドウへ切り替え
     def switch_to_register_user_detail_window(self) -> None:
         # 新規ユーザー登録詳細ウィンドウの表示　 (メインウィンドウは非表示)
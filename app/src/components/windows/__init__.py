@@ -1,15 +1,34 @@
-from ._setup import (
-    SetupWindow
-)
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ._setup import (
+        SetupWindow
+    )
 
-from ._nfc_wait import (
-    NFCWaitWindow
-)
+    from ._nfc_wait import (
+        NFCWaitWindow
+    )
 
-from ._enter_exit_log import (
-    EnterExitLogWindow
-)
+    from ._enter_exit_log import (
+        EnterExitLogWindow
+    )
 
-from ._register_user import (
-    RegisterUserDetailWindow, DeleteUserAlertWindow
-)
\ No newline at end of file
+    from ._register_user import (
+        RegisterUserDetailWindow, DeleteUserAlertWindow
+    )
+
+# ウィンドウを最初に使う時にモジュールを読み込む (表示していないウィンドウのモジュールと, その依存ライブラリを起動時に読み込まないため)
+def __getattr__(name: str) -> object:
+    if name in ('SetupWindow',):
+        from . import _setup as module
+    elif name in ('NFCWaitWindow',):
+        from . import _nfc_wait as module
+    elif name in ('EnterExitLogWindow',):
+        from . import _enter_exit_log as module
+    elif name in ('RegisterUserDetailWindow', 'DeleteUserAlertWindow'):
+        from . import _register_user as module
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value: object = getattr(module, name)
+    globals()[name] = value
+    return value
@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Callable, Literal
 import customtkinter as ctk
 from ...utils.nfc import NFC
+from ...utils.bus import subscribe, unsubscribe, ReaderConnected
 if TYPE_CHECKING:
     from ..windows import RegisterUserDetailWindow
 
@@ -53,7 +54,6 @@ class NFCWaitWindow(ctk.CTkToplevel):
     destroy_callback_success: Callable[[], None] | None
     destroy_callback_failure: Callable[[], None] | None
     nfc_wait_view: NFCWaitView
-    id_nfc_observer: str | None = None
     def __init__(self, master: RegisterUserDetailWindow, width: int, height: int, destroy_callback_success: Callable[[], None] | None = None, destroy_callback_failure: Callable[[], None] | None = None) -> None:
         super(NFCWaitWindow, self).__init__(master=master)
         self.width = width
@@ -102,6 +102,7 @@ class NFCWaitWindow(ctk.CTkToplevel):
     def destroy(self, status: Literal['success', 'failure'] | None = None) -> None:
         # 親ウィンドウからdestroyを呼び出された場合 (親ウィンドウのdestoryループ防止)
         if status is None:
+            self._stop_observe_nfc_connection()
             return super(NFCWaitWindow, self).destroy()
 
         # NFCの接続状況の監視を停止
@@ -140,17 +141,20 @@ class NFCWaitWindow(ctk.CTkToplevel):
                 # NFC待機ウィンドウの破棄
                 super(NFCWaitWindow, self).destroy()
 
-    # NFCの接続状況を監視
+    # NFCの接続状況を監視 (NFCリーダーの接続の通知を購読)
     def _start_observe_nfc_connection(self) -> None:
-        # NFCが接続された場合, NFC待機ウィンドウを閉じる
+        # 既にNFCが接続されている場合, NFC待機ウィンドウを閉じる
         if self.master.nfc.is_connected():
             self.destroy('success')
-
-        # 一定時間後に再度監視
-        self.id_nfc_observer = self.after(100, self._start_observe_nfc_connection)
+        else:
+            subscribe(ReaderConnected, self._on_reader_connected, main_thread=True)
 
     # NFCの接続状況を監視を停止
     def _stop_observe_nfc_connection(self) -> None:
-        if self.id_nfc_observer is not None:
-            self.after_cancel(self.id_nfc_observer)
-            self.id_nfc_observer = None
\ No newline at end of file
+        unsubscribe(ReaderConnected, self._on_reader_connected)
+
+    # NFCリーダーが接続された時に呼ばれるコールバック関数 (NFC待機ウィンドウを閉じる)
+    def _on_reader_connected(self, event: ReaderConnected) -> None:
+        self._stop_observe_nfc_connection()
+        if self.winfo_exists():
+            self.destroy('success')
\ No newline at end of file
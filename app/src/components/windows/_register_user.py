@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 import customtkinter as ctk
 from ...utils.nfc import NFC
+from ...utils.bus import subscribe, unsubscribe, ReaderDisconnected
 from ..windows import NFCWaitWindow
 from ..views import MainView, RegisterUserDetailView, DeleteUserAlertView
 
@@ -13,7 +14,6 @@ class RegisterUserDetailWindow(ctk.CTkToplevel):
     height: int
     nfc: NFC
     nfc_wait_window: NFCWaitWindow | None = None
-    id_nfc_observer: str | None = None
     def __init__(self, master: MainView, root_dir: str, width: int, height: int, title: str = 'Add New User') -> None:
         super(RegisterUserDetailWindow, self).__init__(master=master, width=width, height=height)
         self.root_dir = root_dir
@@ -83,14 +83,14 @@ class RegisterUserDetailWindow(ctk.CTkToplevel):
         # メインウィンドウの表示
         self.master.master.deiconify()
 
-    # NFCの接続状況を監視を開始
+    # NFCの接続状況を監視を開始 (NFCリーダーの切断の通知を購読)
     def _start_observe_nfc_connection(self) -> None:
         # NFCの接続状況の監視を停止 (重複防止)
         self._stop_observe_nfc_connection()
 
-        # NFCが接続されている場合, 監視を継続
+        # NFCが接続されている場合, 切断されるまで監視を継続
         if self.nfc.is_connected():
-            self.id_nfc_observer = self.after(100, self._start_observe_nfc_connection)
+            subscribe(ReaderDisconnected, self._on_reader_disconnected, main_thread=True)
 
         # NFCが接続されていない場合, NFC待機ウィンドウを表示
         else:
@@ -104,9 +104,12 @@ class RegisterUserDetailWindow(ctk.CTkToplevel):
 
     # NFCの接続状況を監視を停止
     def _stop_observe_nfc_connection(self) -> None:
-        if self.id_nfc_observer is not None:
-            self.after_cancel(self.id_nfc_observer)
-            self.id_nfc_observer = None
+        unsubscribe(ReaderDisconnected, self._on_reader_disconnected)
+
+    # NFCリーダーが切断された時に呼ばれるコールバック関数 (全てのNFCリーダーが切断された場合, NFC待機ウィンドウを表示)
+    def _on_reader_disconnected(self, event: ReaderDisconnected) -> None:
+        if self.winfo_exists() and len(event.readers) == 0:
+            self._start_observe_nfc_connection()
 
     # 接続に成功した場合のコールバック関数
     def _destroy_callback_success_for_nfc_wait_window(self) -> None:
@@ -118,7 +121,7 @@ class RegisterUserDetailWindow(ctk.CTkToplevel):
         self.update_idletasks()
 
         # NFCの接続状況の監視を開始
-        self.id_nfc_observer = self.after(100, self._start_observe_nfc_connection)
+        self._start_observe_nfc_connection()
 
     # 接続に失敗した場合のコールバック関数
     def _destroy_callback_failure_for_nfc_wait_window(self) -> None:
@@ -176,9 +179,8 @@ class DeleteUserAlertWindow(ctk.CTkToplevel):
 
     # ユーザー削除アラートウィンドウの終了
     def destroy(self) -> None:
-        # メインウィンドウを表示
+        # メインウィンドウを表示 (ユーザー一覧はユーザー削除の通知により更新される)
         self.master.master.deiconify()
-        self.master.bodyview.update_idletasks()
 
         # ユーザー削除アラートウィンドウの終了
         super(DeleteUserAlertWindow, self).destroy()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import os
 import getpass
 import platform
 
@@ -15,8 +16,15 @@ def set_service(service: str) -> None:
 def get_service() -> str:
     return SERVICE
 
+# データ保存先のディレクトリを指定する環境変数 (ベンチマークなどで, 実際のデータとは別のディレクトリを使う場合に指定する)
+DATA_DIR_ENV: str = 'IMIN_DATA_DIR'
+
 # OSごとにデータ保存先のディレクトリを取得する関数
 def get_data_dir() -> str:
+    # 環境変数で指定されている場合
+    if os.environ.get(DATA_DIR_ENV):
+        return os.environ[DATA_DIR_ENV]
+
     # macOSの場合
     if platform.system() == 'Darwin':
         return f'/Users/{getpass.getuser()}/Library/Application Support/{APP_NAME}'
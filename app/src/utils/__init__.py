@@ -1,6 +1,26 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import importlib
 from ._utils import (
     UserState, UserAction, DEFAULT_USER_STATE, USER_STATE_LABELS, USER_ACTION_LABELS
 )
-from . import db
-from . import nfc
-from . import slack
\ No newline at end of file
+if TYPE_CHECKING:
+    from . import bus
+    from . import db
+    from . import nfc
+    from . import slack
+    from . import report
+
+# サブモジュールを最初に使う時に読み込む (pyscardやslack_sdkなどの読み込みに時間がかかるため, 起動時には読み込まない)
+def __getattr__(name: str) -> object:
+    if name == 'bus':
+        return importlib.import_module('.bus', __name__)
+    elif name == 'db':
+        return importlib.import_module('.db', __name__)
+    elif name == 'nfc':
+        return importlib.import_module('.nfc', __name__)
+    elif name == 'slack':
+        return importlib.import_module('.slack', __name__)
+    elif name == 'report':
+        return importlib.import_module('.report', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
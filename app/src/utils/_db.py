@@ -1,28 +1,277 @@
 from __future__ import annotations
 import os
+import time
+import queue
 import sqlite3
+import logging
 import datetime
 import threading
 from ..core import get_data_dir
+from ._utils import UserState, UserAction
+from ._presence import PresenceCache
+from ._identity import hash_sha256_uid, get_uid_hash_key, UIDHashKeyError
+from .bus import publish, UserAdded, UserRemoved, UserStateChanged
+
+# ロガー
+logger: logging.Logger = logging.getLogger(__name__)
 
 # データベースの名前
 DB_NAME: str = 'ImIn.db'
 DB_PATH: str = f'{get_data_dir()}/db/{DB_NAME}'
 
-# データベースに接続する
+# 接続時に設定するPRAGMA (WALモードで読み取りと書き込みを並行させ, 書き込み時の同期回数を減らす)
+DB_PRAGMAS: dict[str, str | int] = {
+    'journal_mode': 'WAL',      # ジャーナルモード (WAL: 読み取りが書き込みをブロックしない)
+    'synchronous': 'NORMAL',    # 同期モード (WALモードではNORMALでもデータベースの整合性は保たれる)
+    'busy_timeout': 5000,       # 他の接続がロック中の場合の待機時間 (ミリ秒)
+    'temp_store': 'MEMORY',     # 一時テーブル・インデックスの保存先
+    'foreign_keys': 'ON'        # 外部キー制約を有効化
+}
+
+# 接続ごとにキャッシュするプリペアドステートメントの数
+DB_CACHED_STATEMENTS: int = 128
+
+# 入退室イベントの書き込み設定 (短時間に集中したイベントをまとめて1つのトランザクションで書き込む)
+EVENT_LOG_BATCH_WINDOW: float = 0.5 # 最初のイベントから書き込みまでに待機する最大時間 (秒)
+EVENT_LOG_BATCH_SIZE: int = 100     # 1つのトランザクションで書き込むイベントの最大数
+
+# SQLファイルを格納するディレクトリ (root_dirからの相対パス)
+SQL_DIR: str = 'db/sql'
+
+# マイグレーション用のSQLファイルを格納するディレクトリ (root_dirからの相対パス, ファイル名の番号がスキーマのバージョンになる)
+MIGRATIONS_DIR: str = f'{SQL_DIR}/migrations'
+
+# SQLファイルを起動時に一度だけ読み込み, 名前で提供するクラス
+# (例: 0001_insert_user.sql -> 'insert_user', 同じ文字列を使い回すため, sqlite3のステートメントキャッシュが有効になる)
+class SQLStatements(object):
+    sql_dir: str                # SQLファイルを格納するディレクトリ
+    statements: dict[str, str]  # SQL文の辞書 (キー: SQL文の名前)
+    def __init__(self, sql_dir: str) -> None:
+        super(SQLStatements, self).__init__()
+        self.sql_dir = sql_dir
+        self.statements = dict[str, str]()
+        self._load()
+
+    # 名前からSQL文を取得する
+    def get(self, name: str) -> str:
+        if name not in self.statements:
+            raise KeyError(f'SQL statement `{name}` is not found in {self.sql_dir}')
+        return self.statements[name]
+
+    # ディレクトリ内のSQLファイルを読み込み, 検証する
+    def _load(self) -> None:
+        for file_name in sorted(os.listdir(self.sql_dir)):
+            path: str = f'{self.sql_dir}/{file_name}'
+            if not file_name.endswith('.sql') or not os.path.isfile(path):
+                continue
+
+            # ファイル名から番号と拡張子を除いた部分を名前とする
+            name: str = os.path.splitext(file_name)[0].split('_', 1)[-1]
+            if name in self.statements:
+                raise ValueError(f'SQL statement `{name}` is duplicated in {self.sql_dir}')
+
+            with open(path, 'r', encoding='utf-8') as f:
+                sql: str = f.read().strip()
+
+            # 空, または文として完結していないSQL文は読み込み時にエラーとする
+            if sql == '' or not sqlite3.complete_statement(sql):
+                raise ValueError(f'SQL statement `{name}` ({path}) is empty or incomplete')
+
+            self.statements[name] = sql
+
+# 読み込み済みのSQL文 (キー: root_dir)
+_sql_statements: dict[str, SQLStatements] = dict[str, SQLStatements]()
+_sql_statements_lock: threading.Lock = threading.Lock()
+
+# SQL文を読み込む (アプリケーションの起動時に使用. 読み込み済みの場合は何もしない)
+def load_sql_statements(root_dir: str) -> SQLStatements:
+    with _sql_statements_lock:
+        if root_dir not in _sql_statements:
+            _sql_statements[root_dir] = SQLStatements(f'{root_dir}/{SQL_DIR}')
+        return _sql_statements[root_dir]
+
+# 名前からSQL文を取得する
+def get_sql(root_dir: str, name: str) -> str:
+    statements: SQLStatements | None = _sql_statements.get(root_dir)
+    if statements is None:
+        statements = load_sql_statements(root_dir)
+    return statements.get(name)
+
+# スレッドごとにデータベースの接続を保持し, 使い回すためのクラス
+class ConnectionManager(object):
+    db_path: str                                            # データベースのパス
+    _local: threading.local                                 # スレッドごとの接続を保持する領域
+    _connections: dict[threading.Thread, sqlite3.Connection] # 作成済みの接続 (スレッドごと, 終了時にまとめて閉じるため)
+    _lock: threading.Lock                                   # _connectionsを操作する際のロック
+    def __init__(self, db_path: str) -> None:
+        super(ConnectionManager, self).__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections = dict[threading.Thread, sqlite3.Connection]()
+        self._lock = threading.Lock()
+
+    # 現在のスレッドの接続を取得する (存在しない場合は新たに作成する)
+    def get(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection | None = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+            with self._lock:
+                # 終了済みのスレッドの接続を閉じる (短命なスレッドの接続が溜まらないようにするため)
+                for thread in [thread for thread in self._connections.keys() if not thread.is_alive()]:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = connection
+        return connection
+
+    # 現在のスレッドの接続を閉じる (次回のget()で新たな接続が作成される. 接続が壊れた場合の再接続に使用)
+    def reset(self) -> None:
+        connection: sqlite3.Connection | None = getattr(self._local, 'connection', None)
+        if connection is None:
+            return
+        self._local.connection = None
+        with self._lock:
+            self._connections.pop(threading.current_thread(), None)
+        try:
+            connection.close()
+        except Exception as e:
+            pass
+
+    # 全ての接続を閉じる (アプリケーションの終了時に使用)
+    def close_all(self) -> None:
+        with self._lock:
+            for connection in self._connections.values():
+                try:
+                    connection.close()
+                except Exception as e:
+                    pass
+            self._connections = dict[threading.Thread, sqlite3.Connection]()
+        self._local = threading.local()
+
+    # 新たな接続を作成し, PRAGMAを設定する
+    def _connect(self) -> sqlite3.Connection:
+        # 接続の作成 (終了時に別スレッドから閉じるため, check_same_threadは無効化する. 各接続は作成したスレッドのみで使用する)
+        connection: sqlite3.Connection = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=DB_CACHED_STATEMENTS)
+        for key, value in DB_PRAGMAS.items():
+            connection.execute(f'PRAGMA {key}={value}')
+        return connection
+
+# アプリケーション全体で共有する接続マネージャー
+_connection_manager: ConnectionManager = ConnectionManager(DB_PATH)
+
+# データベースに接続する (現在のスレッドの接続を使い回す)
 def connection_db() -> sqlite3.Connection:
-    return sqlite3.connect(DB_PATH)
+    return _connection_manager.get()
+
+# 入退室イベントをキューに溜め, バックグラウンドでまとめて書き込むクラス (メインスレッドをブロックしないため)
+class EventLogWriter(object):
+    root_dir: str
+    _queue: queue.Queue[dict[str, object] | None]   # 書き込み待ちのイベント (Noneは停止の合図)
+    _thread: threading.Thread | None                # 書き込み用のスレッド
+    _lock: threading.Lock                           # スレッドの開始・停止の際のロック
+    def __init__(self, root_dir: str) -> None:
+        super(EventLogWriter, self).__init__()
+        self.root_dir = root_dir
+        self._queue = queue.Queue[dict[str, object] | None]()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # イベントを書き込み待ちのキューに追加する (書き込み用のスレッドが停止している場合は開始する)
+    def put(self, event: dict[str, object]) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._write_loop, name='EventLogWriter-Thread', daemon=True)
+                self._thread.start()
+            self._queue.put(event)
+
+    # 書き込み待ちのイベントが全て書き込まれるまで待機する (書き込みに失敗したイベントは破棄された時点で完了とする)
+    def flush(self) -> None:
+        self._queue.join()
+
+    # 書き込み待ちのイベントを全て書き込んでから, 書き込み用のスレッドを停止する
+    def stop(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join()
+            self._thread = None
+
+    # キューからイベントを取り出し, まとめて書き込むループ
+    def _write_loop(self) -> None:
+        is_running: bool = True
+        while is_running:
+            # 最初のイベントが届くまで待機
+            event: dict[str, object] | None = self._queue.get()
+            if event is None:
+                self._queue.task_done()
+                break
+
+            # 一定時間内に届いたイベントをまとめる
+            events: list[dict[str, object]] = [event]
+            deadline: float = time.monotonic() + EVENT_LOG_BATCH_WINDOW
+            while len(events) < EVENT_LOG_BATCH_SIZE:
+                timeout: float = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    event = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if event is None:
+                    self._queue.task_done()
+                    is_running = False
+                    break
+                events.append(event)
+
+            # 書き込んだイベントの完了を通知 (flush()の待機を解除するため)
+            self._write(events)
+            for _ in events:
+                self._queue.task_done()
+
+    # イベントを1つのトランザクションで書き込む (失敗した場合は新たな接続で1度だけ再試行し, それでも失敗した場合は破棄したイベントを記録する)
+    def _write(self, events: list[dict[str, object]]) -> bool:
+        error: Exception | None = None
+        for attempt in range(2):
+            try:
+                connection: sqlite3.Connection = connection_db()
+                with connection:
+                    connection.executemany(get_sql(self.root_dir, 'insert_event'), events)
+                return True
+
+            # 失敗した場合は接続を作り直して再試行する
+            except Exception as e:
+                error = e
+                logger.warning('Failed to write %d event(s) (attempt %d): %s', len(events), attempt + 1, e)
+                _connection_manager.reset()
+
+        # 再試行しても書き込めなかったイベントは, 後から復元できるように内容を記録する
+        logger.error('Dropped %d event(s) after retry: %s (%s)', len(events), events, error)
+        return False
+
+# 入退室イベントの書き込みを行うインスタンス (キー: root_dir)
+_event_log_writers: dict[str, EventLogWriter] = dict[str, EventLogWriter]()
+_event_log_writers_lock: threading.Lock = threading.Lock()
+
+# 書き込み待ちの入退室イベントが全て書き込まれるまで待機する
+def flush_event_log(root_dir: str) -> None:
+    with _event_log_writers_lock:
+        writer: EventLogWriter | None = _event_log_writers.get(root_dir)
+    if writer is not None:
+        writer.flush()
+
+# データベースの接続を全て閉じる (アプリケーションの終了時に使用. 書き込み待ちのイベントは書き込んでから閉じる)
+def close_db() -> None:
+    with _event_log_writers_lock:
+        for writer in _event_log_writers.values():
+            writer.stop()
+    _connection_manager.close_all()
 
 # ユーザーテーブルを作成する
 def create_users_table(root_dir: str) -> bool:
     try:
         connection: sqlite3.Connection = connection_db()
-        cursor: sqlite3.Cursor = connection.cursor()
-        with open(f'{root_dir}/db/sql/0000_create_users_table.sql', 'r') as f:
-            sql: str = f.read()
-        cursor.execute(sql)
-        connection.commit()
-        connection.close()
+        sql: str = get_sql(root_dir, 'create_users_table')
+        with connection:
+            connection.execute(sql)
 
     # テーブル作成に失敗した場合はFalseを返す
     except Exception as e:
@@ -33,73 +282,225 @@ def create_users_table(root_dir: str) -> bool:
 
     return True
 
-# データベースを初期化する
+# 未適用のマイグレーションを順に適用する (適用済みのバージョンはPRAGMA user_versionで管理)
+def migrate_db(root_dir: str) -> bool:
+    try:
+        connection: sqlite3.Connection = connection_db()
+        version: int = connection.execute('PRAGMA user_version').fetchone()[0]
+
+        # マイグレーションファイルの一覧を取得 (例: 0001_create_index.sql -> バージョン1)
+        migrations: list[tuple[int, str]] = list[tuple[int, str]]()
+        for file_name in os.listdir(f'{root_dir}/{MIGRATIONS_DIR}'):
+            if file_name.endswith('.sql'):
+                migrations.append((int(file_name.split('_', 1)[0]), f'{root_dir}/{MIGRATIONS_DIR}/{file_name}'))
+
+        # 未適用のマイグレーションがある場合は, 適用する前に秘密鍵を読み込めることを確認する
+        # (キーリングを使用できない場合はどのマイグレーションも適用せず, 次回の起動時に再試行する)
+        if any(migration_version > version for migration_version, _ in migrations):
+            get_uid_hash_key()
+
+        # マイグレーションで使用する関数を登録 (SHA-256のハッシュ値のidを秘密鍵付きのハッシュ値に置き換えるため)
+        connection.create_function('hash_sha256_uid', 1, hash_sha256_uid, deterministic=True)
+
+        for migration_version, path in sorted(migrations):
+            # 適用済みのマイグレーションはスキップ
+            if migration_version <= version:
+                continue
+
+            with open(path, 'r', encoding='utf-8') as f:
+                sql: str = f.read().strip()
+
+            # マイグレーションとバージョンの更新を1つのトランザクションで適用する
+            try:
+                connection.executescript(f'BEGIN;\n{sql}\nPRAGMA user_version = {migration_version};\nCOMMIT;')
+            except Exception as e:
+                if connection.in_transaction:
+                    connection.rollback()
+                raise e
+            version = migration_version
+
+    # 秘密鍵を読み込めない場合は, データベースを変更せずにFalseを返す
+    except UIDHashKeyError as e:
+        logger.error('Skipped database migrations because the UID hash key is unavailable: %s', e)
+        return False
+
+    # マイグレーションに失敗した場合は原因を記録し, Falseを返す (失敗したマイグレーションはロールバック済み)
+    except Exception as e:
+        logger.exception('Failed to migrate the database (%s)', DB_PATH)
+        return False
+
+    return True
+
+# データベースを初期化する (起動時に毎回実行し, 未適用のマイグレーションを適用する)
 def initialize_db(root_dir: str) -> bool:
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     res: bool = create_users_table(root_dir)
+    if res:
+        res = migrate_db(root_dir)
+    if res:
+        res = load_presence_cache(root_dir)
     return res
 
+# ユーザーの在室状況のキャッシュ (データベースへの書き込み時に同時に更新する)
+_presence_cache: PresenceCache = PresenceCache()
+
+# データベースからユーザー情報を読み込み, 在室状況のキャッシュを作成する
+def load_presence_cache(root_dir: str) -> bool:
+    try:
+        connection: sqlite3.Connection = connection_db()
+        with _presence_cache.lock:
+            res: list[sqlite3.Row] = connection.execute(get_sql(root_dir, 'select_all_from_users')).fetchall()
+            _presence_cache.load({
+                'id': row[0],
+                'name': row[1],
+                'state': row[2],
+                'created_at': row[3],
+                'updated_at': row[4],
+            } for row in res)
+
+    # 読み込みに失敗した場合はFalseを返す
+    except Exception as e:
+        return False
+
+    return True
+
+# 在室状況のキャッシュを取得する (読み込まれていない場合はデータベースから読み込む)
+def _get_presence_cache(root_dir: str) -> PresenceCache:
+    if not _presence_cache.is_loaded:
+        load_presence_cache(root_dir)
+    return _presence_cache
+
+# ユーザーの状態に対応する入退室イベントのアクションを求める (在室: 入室, 不在: 退室)
+def _action_for_state(state: str | int) -> UserAction:
+    return UserAction.ENTER if UserState(int(state)) == UserState.IN else UserAction.EXIT
+
 # ユーザーを挿入する
 def insert_user(root_dir: str, id: str, name: str, state: str, created_at: datetime.datetime | None = None, updated_at: datetime.datetime | None = None) -> bool:
     try:
         connection: sqlite3.Connection = connection_db()
-        cursor: sqlite3.Cursor = connection.cursor()
-        with open(f'{root_dir}/db/sql/0001_insert_user.sql', 'r') as f:
-            sql: str = f.read()
+        sql: str = get_sql(root_dir, 'insert_user')
         now: datetime.datetime = datetime.datetime.now()
-        cursor.execute(sql, {'id': id,
-                             'name': name,
-                             'state': state,
-                             'created_at': now if created_at is None else created_at,
-                             'updated_at': now if updated_at is None else updated_at}
-                             )
-        connection.commit()
-        connection.close()
+        user: dict[str, object] = {'id': id,
+                                   'name': name,
+                                   'state': state,
+                                   'created_at': now if created_at is None else created_at,
+                                   'updated_at': now if updated_at is None else updated_at}
+        with _presence_cache.lock:
+            with connection:
+                connection.execute(sql, user)
+
+            # キャッシュを更新
+            _presence_cache.put(user)
+            user_info: dict[str, str] | None = _presence_cache.get(id)
+
+            # 初期状態を入退室イベントとして記録 (在室人数の集計がユーザーの状態と一致するようにするため)
+            # (idの変更が書き込み待ちのイベントも付け替えられるよう, ロックを保持したままキューに追加する)
+            log_user_action(root_dir=root_dir, id=id, action=_action_for_state(state), created_at=user['updated_at'])
 
     # 挿入に失敗した場合はFalseを返す
     except Exception as e:
         return False
 
+    # ユーザーの追加を通知
+    publish(UserAdded(id=id, user=user_info))
+
     return True
 
 # ユーザーの状態を更新する
 def update_user_state(root_dir: str, id: str, state: str) -> bool:
     try:
         connection: sqlite3.Connection = connection_db()
-        cursor: sqlite3.Cursor = connection.cursor()
-        with open(f'{root_dir}/db/sql/0002_update_user_state.sql', 'r') as f:
-            sql: str = f.read()
+        sql: str = get_sql(root_dir, 'update_user_state')
         now: datetime.datetime = datetime.datetime.now()
-        cursor.execute(sql, {'id': id, 'state': state, 'updated_at': now})
-        connection.commit()
-        connection.close()
+        with _presence_cache.lock:
+            with connection:
+                connection.execute(sql, {'id': id, 'state': state, 'updated_at': now})
+
+            # キャッシュを更新
+            _presence_cache.update(id, state=state, updated_at=now)
+            user_info: dict[str, str] | None = _presence_cache.get(id)
+
+            # 状態の変更を入退室イベントとして記録 (管理者による変更も在室人数の集計に反映するため)
+            log_user_action(root_dir=root_dir, id=id, action=_action_for_state(state), created_at=now)
 
     # 更新に失敗した場合はFalseを返す
     except Exception as e:
         return False
 
-    # 削除に成功した場合, Slackのキャンバスを更新 (少し時間がかかるため, 非同期で実行)
-    def _update_canvas() -> None:
-        from ..utils.slack import update_slack_canvas_from_db
-        update_slack_canvas_from_db(root_dir=root_dir)
-    threading.Thread(target=_update_canvas).start()
+    # ユーザーの状態の変化を通知 (Slackのキャンバスの更新もこの通知をもとに行う)
+    if user_info is not None:
+        publish(UserStateChanged(id=id, user=user_info))
 
     return True
 
-# ユーザーが登録されているか確認する
-def is_registered_user(root_dir: str, id: str) -> bool:
+# ユーザーの状態を反転し, 更新後のユーザー情報を返す (在室 <-> 不在, 1つのトランザクションで実行. readerは入退室イベントに記録するNFCリーダー名)
+def toggle_user_state(root_dir: str, id: str, reader: str | None = None) -> dict[str, str] | None:
     try:
         connection: sqlite3.Connection = connection_db()
-        cursor: sqlite3.Cursor = connection.cursor()
-        with open(f'{root_dir}/db/sql/0003_select_all_from_users_where_id.sql', 'r') as f:
-            sql: str = f.read()
-        cursor.execute(sql, {'id': id})
-        res: sqlite3.Row | None = cursor.fetchone()
-        connection.close()
+        now: datetime.datetime = datetime.datetime.now()
+        with _presence_cache.lock:
+            with connection:
+                # 状態の反転はSQL内で行う (読み取りから書き込みまでの間に他の更新が割り込まないようにするため)
+                cursor: sqlite3.Cursor = connection.execute(get_sql(root_dir, 'toggle_user_state'), {
+                    'id': id,
+                    'in_state': UserState.IN,
+                    'out_state': UserState.OUT,
+                    'updated_at': now
+                })
+
+                # ユーザーが登録されていない場合はNoneを返す
+                if cursor.rowcount == 0:
+                    return None
+
+                # 同じトランザクション内で更新後のユーザー情報を取得
+                res: sqlite3.Row = connection.execute(get_sql(root_dir, 'select_all_from_users_where_id'), {'id': id}).fetchone()
+
+            user_info: dict[str, str] = {
+                'id': res[0],
+                'name': res[1],
+                'state': res[2],
+                'created_at': res[3],
+                'updated_at': res[4],
+            }
+
+            # キャッシュを更新
+            _presence_cache.put(user_info)
+
+            # 入退室イベントを記録 (在室: 入室, 不在: 退室)
+            log_user_action(
+                root_dir=root_dir,
+                id=id,
+                action=_action_for_state(user_info['state']),
+                reader=reader,
+                created_at=now
+            )
+
+    # 更新に失敗した場合はNoneを返す
+    except Exception as e:
+        return None
 
-        if res is None:
-            return False
-        return True
+    # ユーザーの状態の変化を通知 (Slackのキャンバスの更新もこの通知をもとに行う)
+    publish(UserStateChanged(id=id, user=user_info))
+
+    return user_info
+
+# ユーザーの入退室イベントを記録する (書き込みはバックグラウンドでまとめて行う)
+def log_user_action(root_dir: str, id: str, action: UserAction, reader: str | None = None, created_at: datetime.datetime | None = None) -> None:
+    with _event_log_writers_lock:
+        if root_dir not in _event_log_writers:
+            _event_log_writers[root_dir] = EventLogWriter(root_dir)
+        writer: EventLogWriter = _event_log_writers[root_dir]
+    writer.put({
+        'user_id': id,
+        'action': action,
+        'reader': reader,
+        'created_at': datetime.datetime.now() if created_at is None else created_at
+    })
+
+# ユーザーが登録されているか確認する (キャッシュから取得)
+def is_registered_user(root_dir: str, id: str) -> bool:
+    try:
+        return _get_presence_cache(root_dir).contains(id)
 
     # 確認に失敗した場合はFalseを返す
     except Exception as e:
@@ -110,13 +511,6 @@ def register_user(root_dir: str, id: str, name: str, state: str, created_at: dat
     # 登録されていない場合はユーザーを挿入する
     if not is_registered_user(root_dir, id):
         res: bool = insert_user(root_dir, id, name, state, created_at, updated_at)
-        if res:
-            # 削除に成功した場合, Slackのキャンバスを更新 (少し時間がかかるため, 非同期で実行)
-            def _update_canvas() -> None:
-                from ..utils.slack import update_slack_canvas_from_db
-                update_slack_canvas_from_db(root_dir=root_dir)
-            threading.Thread(target=_update_canvas).start()
-
         return res
 
     # 登録されている場合はFalseを返す
@@ -127,97 +521,94 @@ def register_user(root_dir: str, id: str, name: str, state: str, created_at: dat
 def delete_user(root_dir: str, id: str) -> bool:
     try:
         connection: sqlite3.Connection = connection_db()
-        cursor: sqlite3.Cursor = connection.cursor()
-        with open(f'{root_dir}/db/sql/0005_delete_from_users_where_id.sql', 'r') as f:
-            sql: str = f.read()
-        cursor.execute(sql, {'id': id})
-        connection.commit()
-        connection.close()
+        sql: str = get_sql(root_dir, 'delete_from_users_where_id')
+        with _presence_cache.lock:
+            with connection:
+                connection.execute(sql, {'id': id})
+
+            # キャッシュを更新
+            _presence_cache.remove(id)
 
     # 削除に失敗した場合はFalseを返す
     except Exception as e:
         return False
 
-    # 削除に成功した場合, Slackのキャンバスを更新 (少し時間がかかるため, 非同期で実行)
-    def _update_canvas() -> None:
-        from ..utils.slack import update_slack_canvas_from_db
-        update_slack_canvas_from_db(root_dir=root_dir)
-    threading.Thread(target=_update_canvas).start()
+    # ユーザーの削除を通知
+    publish(UserRemoved(id=id))
 
     return True
 
-# ユーザー情報を取得する
+# ユーザー情報を取得する (キャッシュから取得)
 def get_user_info(root_dir: str, id: str) -> dict[str, str] | None:
     try:
-        connection: sqlite3.Connection = connection_db()
-        cursor: sqlite3.Cursor = connection.cursor()
-        with open(f'{root_dir}/db/sql/0003_select_all_from_users_where_id.sql', 'r') as f:
-            sql: str = f.read()
-        cursor.execute(sql, {'id': id})
-        res: sqlite3.Row | None = cursor.fetchone()
-        connection.close()
-
-        # 取得に成功した場合は辞書型で返す
-        if res is not None:
-            res: dict[str, str] = {
-                'id': res[0],
-                'name': res[1],
-                'state': res[2],
-                'created_at': res[3],
-                'updated_at': res[4],
-            }
-        return res
+        return _get_presence_cache(root_dir).get(id)
 
     # 取得に失敗した場合はNoneを返す
     except Exception as e:
         return None
 
-# 特定の状態のユーザー一覧を取得する
+# 特定の状態のユーザー一覧を取得する (キャッシュから取得, 更新日時の降順)
 def get_users_by_state(root_dir: str, state: str) -> list[dict[str, str]]:
     try:
-        connection: sqlite3.Connection = connection_db()
-        cursor: sqlite3.Cursor = connection.cursor()
-        with open(f'{root_dir}/db/sql/0004_select_all_from_users_where_state.sql', 'r') as f:
-            sql: str = f.read()
-        cursor.execute(sql, {'state': state})
-        res: list[sqlite3.Row] = cursor.fetchall()
-        connection.close()
-
-        users: list[dict[str, str]] = list[dict[str, str]]()
-        for row in res:
-            user: dict[str, str] = {
-                'id': row[0],
-                'name': row[1],
-                'state': row[2],
-                'created_at': row[3],
-                'updated_at': row[4],
-            }
-            users.append(user)
-        return users
+        return _get_presence_cache(root_dir).get_by_state(state)
 
     # 取得に失敗した場合はNoneを返す
     except Exception as e:
         return []
 
-# ユーザーのidの変更
-def change_user_id(root_dir: str, old_id: str, new_id: str) -> bool:
-    # 変更元のユーザーが登録されていない場合はFalseを返す
-    if not is_registered_user(root_dir, old_id):
-        return False
+# 特定の状態のユーザー一覧の一部を取得する (キャッシュから取得, 更新日時の降順でoffset番目からlimit件)
+def get_users_by_state_page(root_dir: str, state: str, offset: int, limit: int) -> list[dict[str, str]]:
+    try:
+        return _get_presence_cache(root_dir).get_by_state(state, offset=offset, limit=limit)
 
-    # 変更先のユーザーがすでに登録されている場合はFalseを返す
-    if is_registered_user(root_dir, new_id):
-        return False
+    # 取得に失敗した場合は空のリストを返す
+    except Exception as e:
+        return []
 
+# 特定の状態のユーザー数を取得する (キャッシュから取得)
+def count_users_by_state(root_dir: str, state: str) -> int:
     try:
-        user_info: dict[str, str] | None = get_user_info(root_dir, old_id)
-
-        # ユーザー情報が取得できない場合はFalseを返す
-        if user_info is None:
-            return False
+        return _get_presence_cache(root_dir).count_by_state(state)
 
-        # 新しいidでユーザーを登録する
-        return register_user(root_dir=root_dir, id=new_id, name=user_info['name'], state=user_info['state'], created_at=user_info['created_at'], updated_at=datetime.datetime.now())
+    # 取得に失敗した場合は0を返す
+    except Exception as e:
+        return 0
 
+# ユーザーのidを変更する (新しいidの挿入, 入退室イベントと集計の付け替え, 古いidの削除を1つのトランザクションで行う)
+def change_user_id(root_dir: str, old_id: str, new_id: str) -> bool:
+    try:
+        connection: sqlite3.Connection = connection_db()
+        presence_cache: PresenceCache = _get_presence_cache(root_dir)
+        with presence_cache.lock:
+            user_info: dict[str, str] | None = presence_cache.get(old_id)
+
+            # 変更元のユーザーが登録されていない, または変更先のユーザーがすでに登録されている場合はFalseを返す
+            if user_info is None or presence_cache.contains(new_id):
+                return False
+
+            # 書き込み待ちの入退室イベントを先に書き込む (古いidのまま後から書き込まれ, 付け替えから漏れないようにするため)
+            # (入退室イベントはロックを保持したままキューに追加されるため, ロックの保持中に新たな古いidのイベントは追加されない)
+            flush_event_log(root_dir)
+
+            user: dict[str, object] = {**user_info, 'id': new_id, 'updated_at': datetime.datetime.now()}
+            ids: dict[str, str] = {'old_id': old_id, 'new_id': new_id}
+            with connection:
+                connection.execute(get_sql(root_dir, 'insert_user'), user)
+                connection.execute(get_sql(root_dir, 'update_events_user_id'), ids)
+                connection.execute(get_sql(root_dir, 'update_daily_user_reports_user_id'), ids)
+                connection.execute(get_sql(root_dir, 'delete_from_users_where_id'), {'id': old_id})
+
+            # キャッシュを更新
+            presence_cache.remove(old_id)
+            presence_cache.put(user)
+            new_user_info: dict[str, str] | None = presence_cache.get(new_id)
+
+    # 変更に失敗した場合はFalseを返す
     except Exception as e:
-        return False
\ No newline at end of file
+        return False
+
+    # 古いidの削除と新しいidの追加を通知
+    publish(UserRemoved(id=old_id))
+    publish(UserAdded(id=new_id, user=new_user_info))
+
+    return True
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import hashlib
+import logging
+import secrets
+import functools
+import threading
+import keyring
+from ..core import get_service
+
+# ロガー
+logger: logging.Logger = logging.getLogger(__name__)
+
+# UIDのハッシュ化に使用する秘密鍵のキーリング上の名前
+# 登録済みのユーザーのidはこの秘密鍵から求めるため, 秘密鍵を失うと全てのユーザーを登録し直す必要がある
+# (別の端末への移行やOSの再インストールの前に, キーリングのサービス (既定: `ImIn-Service`) の`UID_HASH_KEY`をバックアップすること)
+UID_HASH_KEY_NAME: str = 'UID_HASH_KEY'
+
+# UIDのハッシュ化に使用する秘密鍵の長さ (バイト)
+UID_HASH_KEY_SIZE: int = 32
+
+# ハッシュ値の長さ (バイト, 16進数の文字列で64文字になり, 既存のSHA-256のハッシュ値と同じ長さ)
+UID_HASH_DIGEST_SIZE: int = 32
+
+# ハッシュ値を保持する最大数 (最近読み取ったUIDのハッシュ化をやり直さないため)
+UID_HASH_CACHE_SIZE: int = 1024
+
+# キーリングから秘密鍵を読み込めない場合の例外
+# (秘密鍵なしでは登録済みのユーザーを識別できず, 別の鍵で登録すると以後のユーザーが識別できなくなるため, 古いハッシュ化に戻さずに起動を中止する)
+class UIDHashKeyError(RuntimeError):
+    pass
+
+# 読み込んだ秘密鍵 (最初に使う時にキーリングから読み込む)
+_uid_hash_key: bytes | None = None
+_uid_hash_key_lock: threading.Lock = threading.Lock()
+
+# UIDのハッシュ化に使用する秘密鍵を取得する (インストールごとに生成し, Slackのトークンと同じくキーリングに保存する)
+def get_uid_hash_key() -> bytes:
+    global _uid_hash_key
+    with _uid_hash_key_lock:
+        if _uid_hash_key is None:
+            service: str = get_service()
+            try:
+                key: str | None = keyring.get_password(service, UID_HASH_KEY_NAME)
+
+                # 秘密鍵がない場合は生成して保存する
+                if key is None:
+                    key = secrets.token_hex(UID_HASH_KEY_SIZE)
+                    keyring.set_password(service, UID_HASH_KEY_NAME, key)
+                _uid_hash_key = bytes.fromhex(key)
+
+            # キーリングを使用できない場合や, 保存されている秘密鍵が壊れている場合
+            except Exception as e:
+                logger.error('Failed to load %s from the keyring (service: %s): %s', UID_HASH_KEY_NAME, service, e)
+                raise UIDHashKeyError(
+                    f'Cannot load the UID hash key `{UID_HASH_KEY_NAME}` from the keyring (service: {service}). '
+                    'Make sure the keyring is unlocked and available, or restore the key from a backup.'
+                ) from e
+        return _uid_hash_key
+
+# SHA-256のハッシュ値を秘密鍵付きのBLAKE2でハッシュ化する (既存のSHA-256のハッシュ値から移行できるようにするため, SHA-256のハッシュ値をハッシュ化する)
+@functools.lru_cache(maxsize=UID_HASH_CACHE_SIZE)
+def hash_sha256_uid(sha256_uid: str) -> str:
+    return hashlib.blake2b(sha256_uid.encode('utf-8'), digest_size=UID_HASH_DIGEST_SIZE, key=get_uid_hash_key()).hexdigest()
+
+# NFCタグのUIDからユーザーのidを求める
+@functools.lru_cache(maxsize=UID_HASH_CACHE_SIZE)
+def hash_uid(uid: str) -> str:
+    return hash_sha256_uid(hashlib.sha256(uid.encode('utf-8')).hexdigest())
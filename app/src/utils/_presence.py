@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import Iterable
+import threading
+
+# ユーザーの在室状況をメモリ上に保持するクラス (キー: NFCタグIDのハッシュ値)
+# データベースへの書き込みと同時に更新し (ライトスルー), 読み取りはデータベースにアクセスせずに行う (変更の通知はイベントバスで行う)
+class PresenceCache(object):
+    lock: threading.RLock                           # データベースへの書き込みとキャッシュの更新をまとめて行うためのロック
+    is_loaded: bool                                 # データベースから読み込み済みかどうか
+    _users: dict[str, dict[str, str]]               # ユーザー情報の辞書
+    _users_by_state: dict[str, list[dict[str, str]]] # 状態ごとのユーザー一覧 (更新日時の降順, 変更があるまで使い回す)
+    def __init__(self) -> None:
+        super(PresenceCache, self).__init__()
+        self.lock = threading.RLock()
+        self.is_loaded = False
+        self._users = dict[str, dict[str, str]]()
+        self._users_by_state = dict[str, list[dict[str, str]]]()
+
+    # データベースから取得したユーザー情報でキャッシュを置き換える
+    def load(self, users: Iterable[dict[str, str]]) -> None:
+        with self.lock:
+            self._users = {user['id']: self._normalize(user) for user in users}
+            self._users_by_state = dict[str, list[dict[str, str]]]()
+            self.is_loaded = True
+
+    # キャッシュを破棄する (次回の読み取り時にデータベースから読み込み直す)
+    def clear(self) -> None:
+        with self.lock:
+            self._users = dict[str, dict[str, str]]()
+            self._users_by_state = dict[str, list[dict[str, str]]]()
+            self.is_loaded = False
+
+    # ユーザーが登録されているか確認する
+    def contains(self, id: str) -> bool:
+        return id in self._users
+
+    # ユーザー情報を取得する (呼び出し元での変更がキャッシュに影響しないよう, コピーを返す)
+    def get(self, id: str) -> dict[str, str] | None:
+        user: dict[str, str] | None = self._users.get(id)
+        return dict(user) if user is not None else None
+
+    # 特定の状態のユーザー一覧を取得する (更新日時の降順, offsetとlimitで範囲を指定した場合はその範囲のみをコピーして返す)
+    def get_by_state(self, state: str, offset: int = 0, limit: int | None = None) -> list[dict[str, str]]:
+        with self.lock:
+            users: list[dict[str, str]] = self._sorted_by_state(state)
+            return [dict(user) for user in users[offset:None if limit is None else offset + limit]]
+
+    # 特定の状態のユーザー数を取得する
+    def count_by_state(self, state: str) -> int:
+        with self.lock:
+            return len(self._sorted_by_state(state))
+
+    # 特定の状態のユーザー一覧を更新日時の降順で取得する (変更があるまで使い回す)
+    def _sorted_by_state(self, state: str) -> list[dict[str, str]]:
+        state = str(int(state))
+        if state not in self._users_by_state:
+            self._users_by_state[state] = sorted(
+                [user for user in self._users.values() if user['state'] == state],
+                key=lambda user: user['updated_at'],
+                reverse=True
+            )
+        return self._users_by_state[state]
+
+    # ユーザー情報を追加・更新する
+    def put(self, user: dict[str, str]) -> None:
+        with self.lock:
+            user = self._normalize(user)
+            self._users[user['id']] = user
+            self._users_by_state = dict[str, list[dict[str, str]]]()
+
+    # ユーザー情報の一部を更新する (登録されていない場合は何もしない)
+    def update(self, id: str, **values: object) -> None:
+        with self.lock:
+            if id in self._users:
+                self.put({**self._users[id], **values})
+
+    # ユーザー情報を削除する
+    def remove(self, id: str) -> None:
+        with self.lock:
+            if self._users.pop(id, None) is not None:
+                self._users_by_state = dict[str, list[dict[str, str]]]()
+
+    # データベースと同じ形式に揃える (状態は数値の文字列, 日時は文字列)
+    @staticmethod
+    def _normalize(user: dict[str, object]) -> dict[str, str]:
+        return {
+            'id': str(user['id']),
+            'name': str(user['name']),
+            'state': str(int(user['state'])),
+            'created_at': str(user['created_at']),
+            'updated_at': str(user['updated_at'])
+        }
@@ -0,0 +1,206 @@
+from __future__ import annotations
+from typing import Callable, Any
+import queue
+import logging
+import threading
+import concurrent.futures
+import dataclasses
+import tkinter as tk
+
+# ロガー
+logger: logging.Logger = logging.getLogger(__name__)
+
+# メインスレッドで配信するイベントを処理する間隔 (ミリ秒)
+DEFAULT_MAIN_THREAD_PUMP_INTERVAL: int = 50
+
+# イベントバスで配信するイベントの基底クラス
+@dataclasses.dataclass(frozen=True)
+class BusEvent(object):
+    pass
+
+# ユーザーに関するイベントの基底クラス
+@dataclasses.dataclass(frozen=True)
+class UserEvent(BusEvent):
+    id: str     # ユーザーのid (NFCタグIDのハッシュ値)
+
+# ユーザーが追加されたことを表すイベント
+@dataclasses.dataclass(frozen=True)
+class UserAdded(UserEvent):
+    user: dict[str, str]    # 追加されたユーザー情報
+
+# ユーザーが削除されたことを表すイベント
+@dataclasses.dataclass(frozen=True)
+class UserRemoved(UserEvent):
+    pass
+
+# ユーザーの在室状態が変化したことを表すイベント
+@dataclasses.dataclass(frozen=True)
+class UserStateChanged(UserEvent):
+    user: dict[str, str]    # 変更後のユーザー情報
+
+# NFCリーダーに関するイベントの基底クラス
+@dataclasses.dataclass(frozen=True)
+class ReaderEvent(BusEvent):
+    reader: str                 # 接続・切断されたNFCリーダーの名前
+    readers: tuple[str, ...]    # 変化後に接続されているNFCリーダーの名前の一覧
+
+# NFCリーダーが接続されたことを表すイベント
+@dataclasses.dataclass(frozen=True)
+class ReaderConnected(ReaderEvent):
+    pass
+
+# NFCリーダーが切断されたことを表すイベント
+@dataclasses.dataclass(frozen=True)
+class ReaderDisconnected(ReaderEvent):
+    pass
+
+# Slackのトークンが保存・削除されたことを表すイベント
+@dataclasses.dataclass(frozen=True)
+class SlackTokensChanged(BusEvent):
+    is_registered: bool     # 変化後にトークンが全て登録されているかどうか
+
+# イベントの購読者を表すデータクラス
+@dataclasses.dataclass(frozen=True)
+class Subscriber(object):
+    event_type: type[BusEvent]          # 購読するイベントの型 (サブクラスのイベントも配信する)
+    callback: Callable[[Any], None]     # イベントを受け取るコールバック関数
+    main_thread: bool                   # メインスレッド (Tkのメインループ) で配信するかどうか
+
+# イベントの発行と購読を仲介するクラス
+# main_thread=Trueの購読者へのイベントはキューに溜め, Tkのメインループ上でafter()により配信する (ワーカースレッドからウィジェットを操作しないため)
+class EventBus(object):
+    _subscribers: list[Subscriber]
+    _lock: threading.Lock
+    _main_thread_queue: queue.Queue[tuple[Callable[..., None], tuple[Any, ...]]]
+    _master: tk.Misc | None                 # メインループを実行しているウィジェット
+    _id_pump: str | None                    # メインスレッドでの配信処理のafterのid
+    _executor: concurrent.futures.ThreadPoolExecutor | None # ワーカースレッドで関数を実行するエグゼキューター (最初に使う時に作成)
+    pump_interval: int                      # メインスレッドで配信する間隔 (ミリ秒)
+    def __init__(self, pump_interval: int = DEFAULT_MAIN_THREAD_PUMP_INTERVAL) -> None:
+        super(EventBus, self).__init__()
+        self._subscribers = list[Subscriber]()
+        self._lock = threading.Lock()
+        self._main_thread_queue = queue.Queue[tuple[Callable[..., None], tuple[Any, ...]]]()
+        self._master = None
+        self._id_pump = None
+        self._executor = None
+        self.pump_interval = pump_interval
+
+    # イベントを購読する
+    def subscribe(self, event_type: type[BusEvent], callback: Callable[[Any], None], main_thread: bool = False) -> None:
+        with self._lock:
+            self._subscribers.append(Subscriber(event_type=event_type, callback=callback, main_thread=main_thread))
+
+    # イベントの購読を解除する
+    def unsubscribe(self, event_type: type[BusEvent], callback: Callable[[Any], None]) -> None:
+        with self._lock:
+            self._subscribers = [
+                subscriber for subscriber in self._subscribers
+                if not (subscriber.event_type is event_type and subscriber.callback == callback)
+            ]
+
+    # イベントを発行する (どのスレッドからでも呼び出せる)
+    def publish(self, event: BusEvent) -> None:
+        with self._lock:
+            subscribers: list[Subscriber] = [subscriber for subscriber in self._subscribers if isinstance(event, subscriber.event_type)]
+        for subscriber in subscribers:
+            if subscriber.main_thread:
+                self.call_in_main_thread(subscriber.callback, event)
+            else:
+                try:
+                    subscriber.callback(event)
+                except Exception as e:
+                    logger.exception('Subscriber %r failed to handle %r', subscriber.callback, event)
+
+    # 関数をメインスレッドで実行する (どのスレッドからでも呼び出せる)
+    # メインループに接続されていない場合 (接続前・切断後) は, 呼び出し元のスレッドからウィジェットを操作しないよう実行せずに破棄する
+    def call_in_main_thread(self, func: Callable[..., None], *args: Any) -> None:
+        if self._master is None:
+            logger.debug('Dropped %r because the event bus is not attached to a main loop', func)
+            return
+        self._main_thread_queue.put((func, args))
+
+    # 関数をワーカースレッドで実行し, 結果をメインスレッドでコールバック関数に渡す (データベースへのアクセスなどでメインループを止めないため)
+    # ワーカースレッドは1つのため, 関数は呼び出した順に実行される
+    def call_in_worker_thread(self, func: Callable[..., Any], *args: Any, callback: Callable[[Any], None] | None = None) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='EventBus-Worker-Thread')
+            executor: concurrent.futures.ThreadPoolExecutor = self._executor
+
+        def _run() -> None:
+            try:
+                result: Any = func(*args)
+            except Exception as e:
+                logger.exception('Worker thread call %r failed', func)
+                return
+            if callback is not None:
+                self.call_in_main_thread(callback, result)
+        executor.submit(_run)
+
+    # Tkのメインループに接続し, メインスレッドでの配信を開始する (メインスレッドから呼び出す)
+    def attach(self, master: tk.Misc) -> None:
+        self.detach()
+        self._master = master
+        self._pump()
+
+    # Tkのメインループから切断する (メインスレッドから呼び出す)
+    # ワーカースレッドで実行中の関数の終了を待つ (コールバック関数はメインループから切断するため実行されない)
+    def detach(self) -> None:
+        with self._lock:
+            executor: concurrent.futures.ThreadPoolExecutor | None = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if self._master is not None and self._id_pump is not None:
+            try:
+                self._master.after_cancel(self._id_pump)
+            except Exception as e:
+                pass
+        self._master = None
+        self._id_pump = None
+
+    # キューに溜まった関数をメインスレッドで実行する
+    def _pump(self) -> None:
+        while True:
+            try:
+                func, args = self._main_thread_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                logger.exception('Main thread call %r failed', func)
+        if self._master is not None:
+            self._id_pump = self._master.after(self.pump_interval, self._pump)
+
+# アプリケーション全体で共有するイベントバス
+_bus: EventBus = EventBus()
+
+# イベントを購読する
+def subscribe(event_type: type[BusEvent], callback: Callable[[Any], None], main_thread: bool = False) -> None:
+    _bus.subscribe(event_type, callback, main_thread)
+
+# イベントの購読を解除する
+def unsubscribe(event_type: type[BusEvent], callback: Callable[[Any], None]) -> None:
+    _bus.unsubscribe(event_type, callback)
+
+# イベントを発行する
+def publish(event: BusEvent) -> None:
+    _bus.publish(event)
+
+# 関数をメインスレッドで実行する
+def call_in_main_thread(func: Callable[..., None], *args: Any) -> None:
+    _bus.call_in_main_thread(func, *args)
+
+# 関数をワーカースレッドで実行し, 結果をメインスレッドでコールバック関数に渡す
+def call_in_worker_thread(func: Callable[..., Any], *args: Any, callback: Callable[[Any], None] | None = None) -> None:
+    _bus.call_in_worker_thread(func, *args, callback=callback)
+
+# Tkのメインループに接続する
+def attach(master: tk.Misc) -> None:
+    _bus.attach(master)
+
+# Tkのメインループから切断する
+def detach() -> None:
+    _bus.detach()
@@ -1,11 +1,23 @@
 from ._db import (
     initialize_db,
+    close_db,
+    load_sql_statements,
     create_users_table,
+    migrate_db,
+    load_presence_cache,
     is_registered_user,
     register_user,
     update_user_state,
+    toggle_user_state,
+    log_user_action,
     delete_user,
     get_user_info,
     get_users_by_state,
+    get_users_by_state_page,
+    count_users_by_state,
     change_user_id
+)
+from ._identity import (
+    get_uid_hash_key,
+    UIDHashKeyError
 )
\ No newline at end of file
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Callable
 import time
-import hashlib
+import queue
 import dataclasses
 import threading
 from smartcard.System import readers
@@ -9,19 +9,42 @@ from smartcard.CardType import CardType, AnyCardType
 from smartcard.CardRequest import CardRequest
 from smartcard.PassThruCardService import PassThruCardService
 from smartcard.Exceptions import NoCardException, CardRequestException
+from smartcard.ReaderMonitoring import ReaderMonitor, ReaderObserver
+from smartcard.scard import (
+    SCardEstablishContext, SCardReleaseContext, SCardListReaders, SCardGetStatusChange, SCardCancel,
+    SCardConnect, SCardTransmit, SCardDisconnect, SCardGetErrorMessage,
+    SCARD_SCOPE_USER, SCARD_SHARE_SHARED, SCARD_PROTOCOL_T0, SCARD_PROTOCOL_T1, SCARD_LEAVE_CARD,
+    SCARD_STATE_UNAWARE, SCARD_STATE_PRESENT, SCARD_STATE_MUTE, SCARD_STATE_CHANGED, SCARD_STATE_UNKNOWN, SCARD_STATE_IGNORE,
+    SCARD_S_SUCCESS, SCARD_E_CANCELLED, SCARD_E_TIMEOUT, SCARD_E_NO_READERS_AVAILABLE, SCARD_W_REMOVED_CARD,
+    INFINITE
+)
 from smartcard.util import toHexString
+from ._identity import hash_uid
+from .bus import publish, call_in_main_thread, ReaderConnected, ReaderDisconnected
 
-# NFCタグのUIDを表す型 (SHA-256でハッシュ化するメソッドを実装)
+# NFCタグのUIDを表す型 (ユーザーのidを求めるメソッドを実装)
 class UID(str):
-    def sha256(self) -> str:
-        return hashlib.sha256(self.encode('utf-8')).hexdigest()
+    # ユーザーのid (秘密鍵付きのハッシュ値) を求める
+    def hashed(self) -> str:
+        return hash_uid(self)
 
 # NFCリーダーとの通信に使用するコマンド
 COMMAND_GET_UID = [0xFF, 0xCA, 0x00, 0x00, 0x00] # NFCタグのUIDを取得するコマンド
 
+# NFCリーダーの接続・切断を通知する特殊なリーダー名 (PC/SCのPnP通知)
+PNP_NOTIFICATION_READER: str = '\\\\?PnP?\\Notification'
+
+# NFCタグの到着をPC/SCの状態変化の通知で待機するかどうか (Falseの場合はタイムアウト付きの待機を繰り返す)
+USE_STATUS_CHANGE_WAIT: bool = True
+
 # 各種タイムアウト設定
 DEFAULT_TIMEOUT_NFC_WAIT: float = 10e-2 # NFC読み取りのデフォルトの待機タイムアウト時間 (秒)
 DEFAULT_TIMEOUT_SAME_UID: float = 3.0   # 同じUIDを無視するデフォルトのタイムアウト時間 (秒)
+DEFAULT_READER_MONITOR_PERIOD: float = 1.0 # NFCリーダーの接続状況を確認する間隔 (秒)
+DEFAULT_READER_RESCAN_INTERVAL: float = 1.0 # PnP通知を使用できない場合にNFCリーダーの一覧を取得し直す間隔 (秒)
+DEFAULT_TIMEOUT_NFC_RETRY: float = 1.0  # PC/SCのエラー後に再接続するまでの待機時間 (秒)
+DEFAULT_TIMEOUT_NFC_RETRY_MAX: float = 30.0 # PC/SCのエラーが続いた場合に再接続するまでの最大の待機時間 (秒, エラーごとに待機時間を2倍にする)
+DEFAULT_WORKER_CHECK_INTERVAL: float = 5.0  # PnP通知の待機中に, 終了したNFCリーダーの監視を確認して再開する間隔 (秒)
 
 # NFCのレスポンスを表すデータクラス
 @dataclasses.dataclass
@@ -30,63 +53,153 @@ class NFCResponse(object):
     uid: UID | None
     error_message: Exception | None
     timestamp: float
+    reader: str | None = None   # 読み取ったNFCリーダーの名前
+
+# NFCリーダーの接続・切断を監視し, イベントバスに通知するクラス
+# 接続状況の確認はpyscardのReaderMonitorのスレッドで行い, 確認結果を保持する (メインスレッドでreaders()を呼び出さないため)
+class NFCReaderMonitor(ReaderObserver):
+    period: float                           # NFCリーダーの接続状況を確認する間隔 (秒)
+    _lock: threading.RLock
+    _readers: list[str]                     # 接続されているNFCリーダーの名前の一覧
+    _reader_monitor: ReaderMonitor | None   # NFCリーダーの接続状況を監視するReaderMonitor (監視中でない場合はNone)
+    def __init__(self, period: float = DEFAULT_READER_MONITOR_PERIOD) -> None:
+        super(NFCReaderMonitor, self).__init__()
+        self.period = period
+        self._lock = threading.RLock()
+        self._readers = list[str]()
+        self._reader_monitor = None
+
+    # 監視中かどうか
+    @property
+    def is_running(self) -> bool:
+        return self._reader_monitor is not None
+
+    # 監視を開始する (既に監視中の場合は何もしない)
+    def start(self) -> None:
+        with self._lock:
+            if self._reader_monitor is None:
+                self._reader_monitor = ReaderMonitor(readerProc=readers, period=self.period)
+                self._reader_monitor.addObserver(self)
+
+    # 監視を停止する
+    def stop(self) -> None:
+        with self._lock:
+            if self._reader_monitor is not None:
+                self._reader_monitor.deleteObserver(self)
+                self._reader_monitor = None
+                self._readers = list[str]()
+
+    # 接続されているNFCリーダーの名前の一覧を取得する (最後に確認した結果を返す)
+    def get_readers(self) -> list[str]:
+        with self._lock:
+            return list(self._readers)
+
+    # NFCリーダーの接続・切断時にReaderMonitorのスレッドから呼ばれるメソッド
+    def update(self, observable: ReaderMonitor, handlers: tuple[list[object], list[object]]) -> None:
+        added_readers, removed_readers = handlers
+        with self._lock:
+            for reader in removed_readers:
+                if str(reader) in self._readers:
+                    self._readers.remove(str(reader))
+            for reader in added_readers:
+                if str(reader) not in self._readers:
+                    self._readers.append(str(reader))
+            current_readers: tuple[str, ...] = tuple(self._readers)
+
+        # 接続・切断をイベントバスに通知
+        for reader in removed_readers:
+            publish(ReaderDisconnected(reader=str(reader), readers=current_readers))
+        for reader in added_readers:
+            publish(ReaderConnected(reader=str(reader), readers=current_readers))
+
+# アプリケーション全体で共有するNFCリーダーの監視
+_reader_monitor: NFCReaderMonitor = NFCReaderMonitor()
+
+# NFCリーダーの接続状況の監視を開始する
+def start_reader_monitor() -> None:
+    _reader_monitor.start()
+
+# NFCリーダーの接続状況の監視を停止する
+def stop_reader_monitor() -> None:
+    _reader_monitor.stop()
+
+# 接続されているNFCリーダーの名前の一覧を取得する (監視していない場合は監視を開始する)
+def get_connected_readers() -> list[str]:
+    _reader_monitor.start()
+    return _reader_monitor.get_readers()
 
 # NFCセッションを管理するクラス
+# 1つのスレッドで読み取りを繰り返し, CardRequestを使い回す (読み取ったレスポンスはキューで受け渡す)
+# CardRequestはPC/SCのコンテキストを作成するため, タイムアウト付きの待機を繰り返す場合のみ, 最初の読み取り時に作成する
 class NFCSession(object):
-    card_type: CardType                 # NFCカードのタイプ
-    card_request: CardRequest           # NFCカードリクエスト
-    _session: threading.Thread | None   # NFCセッション用のスレッド
-    response: NFCResponse               # NFCのレスポンス情報
-    is_running: bool                    # NFCセッションが実行中かどうか
-    is_changed: bool                    # NFCタグの状態が変化したかどうか
-    def __init__(self, response: NFCResponse | None = None) -> None:
+    card_type: CardType                     # NFCカードのタイプ
+    card_request: CardRequest | None        # NFCカードリクエスト (セッション中は使い回す. 最初の読み取りまではNone)
+    responses: queue.Queue[NFCResponse | None] # 読み取ったレスポンスを受け渡すキュー
+    _session: threading.Thread | None       # NFCセッション用のスレッド
+    _stop_event: threading.Event            # NFCセッションの停止を通知するイベント
+    _response_lock: threading.Lock          # 複数のNFCリーダーから同時に読み取った場合にレスポンスを更新するためのロック
+    _uid_timestamps: dict[UID, float]       # UIDごとの最後に読み取った時刻 (同じUIDを無視するために使用)
+    response: NFCResponse                   # 最後に読み取ったレスポンス
+    is_running: bool                        # NFCセッションが実行中かどうか
+    def __init__(self, responses: queue.Queue[NFCResponse | None], response: NFCResponse | None = None) -> None:
         super(NFCSession, self).__init__()
         self.card_type = AnyCardType()
-        self.card_request = CardRequest(cardType=self.card_type, timeout=DEFAULT_TIMEOUT_NFC_WAIT)
+        self.card_request = None
+        self.responses = responses
         self._session = None
-        if response is None:
-            self.response = NFCResponse(
-                status=None,
-                uid=None,
-                error_message=None,
-                timestamp=time.time()
-            )
-        else:
+        self._stop_event = threading.Event()
+        self._response_lock = threading.Lock()
+        self.clear_response()
+
+        # 前回のレスポンスを引き継ぐ (直前に読み取ったUIDを無視するため)
+        if response is not None:
             self.response = response
+            if response.uid is not None:
+                self._uid_timestamps[response.uid] = response.timestamp
         self.is_running = False
-        self.is_changed = False
 
     # NFCセッションを開始するメソッド
     def start(self) -> None:
         if not self.is_running:
             self.is_running = True
-            self._session = threading.Thread(target=self._read_uid_loop, name='NFCSession-Thread')
+            self._stop_event.clear()
+            self._session = threading.Thread(target=self._read_uid_loop, name='NFCSession-Thread', daemon=True)
             self._session.start()
 
     # NFCセッションのスレッドが終了するのを待機するメソッド
     def join(self) -> None:
-        if self._session is not None:
+        if self._session is not None and self._session is not threading.current_thread():
             self._session.join()
 
     # NFCセッションを停止するメソッド
     def stop(self) -> None:
         if self.is_running:
             self.is_running = False
-            if self._session is not None:
-                self._session.join()
+            self._stop_event.set()
+            self.join()
 
-    # レスポンスを初期化するメソッド (もう一度読み取りを行うため)
+    # レスポンスを初期化するメソッド (直前と同じUIDでも, もう一度読み取りを行うため)
     def clear_response(self) -> None:
-        self.response = NFCResponse(
-            status=None,
-            uid=None,
-            error_message=None,
-            timestamp=time.time()
-        )
+        with self._response_lock:
+            self._uid_timestamps = dict[UID, float]()
+            self.response = NFCResponse(
+                status=None,
+                uid=None,
+                error_message=None,
+                timestamp=time.time()
+            )
 
-    # UIDを読み取るか想定外の例外が発生するまでループするメソッド
+    # NFCセッションが停止されるまでUIDの読み取りを繰り返すメソッド
     def _read_uid_loop(self) -> None:
+        # NFCカードリクエストを作成 (作成できない場合はエラーのレスポンスを追加して終了)
+        if self.card_request is None:
+            try:
+                self.card_request = CardRequest(cardType=self.card_type, timeout=DEFAULT_TIMEOUT_NFC_WAIT)
+            except Exception as e:
+                self._put_error(e)
+                return
         while self.is_running:
+            connection = None
             try:
                 # NFCタグを検知するまで待機 (タイムアウトあり)
                 service: PassThruCardService = self.card_request.waitforcard()
@@ -96,21 +209,7 @@ class NFCSession(object):
 
                 # UIDの取得に成功した場合
                 if sw1 == 0x90 and sw2 == 0x00:
-                    uid: UID = UID(toHexString(data).replace(' ', ''))
-
-                    # 直前と同じUIDが読み取られ、かつタイムアウト時間内の場合は無視
-                    if self.response.uid == uid and time.time() < self.response.timestamp + DEFAULT_TIMEOUT_SAME_UID:
-                        continue # 続行
-
-                    # 新しいUIDが読み取られた場合、レスポンスを更新
-                    self.response = NFCResponse(
-                        status=True,
-                        uid=uid,
-                        error_message=None,
-                        timestamp=time.time()
-                    )
-                    self.is_changed = True
-                    break
+                    self._put_uid(UID(toHexString(data).replace(' ', '')), reader=str(connection.getReader()))
 
             # カードがリーダーにない場合の例外処理
             except NoCardException:
@@ -120,33 +219,279 @@ class NFCSession(object):
             except CardRequestException:
                 continue # 続行
 
-            # その他の例外処理
+            # その他の例外処理 (エラーのレスポンスをキューに追加し, 少し待ってから続行)
             except Exception as e:
-                self.response = NFCResponse(
-                    status=False,
-                    uid=None,
-                    error_message=e,
-                    timestamp=time.time()
-                )
-                break
+                self._put_error(e)
+                self._stop_event.wait(DEFAULT_TIMEOUT_NFC_WAIT)
+
+            # NFCタグとの接続を切断 (次の読み取りで接続し直すため)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.disconnect()
+                    except Exception as e:
+                        pass
+
+    # 読み取ったUIDのレスポンスをキューに追加するメソッド (同じUIDがタイムアウト時間内に読み取られていた場合は, 別のNFCリーダーでも無視)
+    def _put_uid(self, uid: UID, reader: str | None = None) -> None:
+        with self._response_lock:
+            now: float = time.time()
+            if now < self._uid_timestamps.get(uid, 0.0) + DEFAULT_TIMEOUT_SAME_UID:
+                return
+
+            # タイムアウト時間を過ぎたUIDを削除
+            self._uid_timestamps = {_uid: timestamp for _uid, timestamp in self._uid_timestamps.items() if now < timestamp + DEFAULT_TIMEOUT_SAME_UID}
+            self._uid_timestamps[uid] = now
+
+            # 新しいUIDが読み取られた場合、レスポンスを更新してキューに追加
+            self.response = NFCResponse(
+                status=True,
+                uid=uid,
+                error_message=None,
+                timestamp=now,
+                reader=reader
+            )
+            self.responses.put(self.response)
+
+    # エラーのレスポンスをキューに追加するメソッド
+    def _put_error(self, error: Exception, reader: str | None = None) -> None:
+        self.responses.put(NFCResponse(
+            status=False,
+            uid=None,
+            error_message=error,
+            timestamp=time.time(),
+            reader=reader
+        ))
+
+# PC/SCの状態変化の通知で1台のNFCリーダーへのNFCタグの到着を待機するクラス
+# NFCリーダーごとにスレッドとPC/SCのコンテキストを持つため, 複数のNFCリーダーで同時に読み取っても互いに待たされない
+class NFCReaderWorker(object):
+    session: NFCStatusChangeSession     # 読み取ったレスポンスを受け渡すNFCセッション
+    reader: str                         # NFCリーダーの名前
+    _thread: threading.Thread | None    # NFCリーダーを監視するスレッド
+    _lock: threading.Lock               # PC/SCのコンテキストを参照するためのロック
+    _hcontext: int | None               # PC/SCのコンテキスト (待機中のみ)
+    _stop_event: threading.Event        # 監視の停止を通知するイベント (再接続の待機を中断するため)
+    _retry_interval: float              # PC/SCのエラー後に再接続するまでの待機時間 (秒, エラーが続くごとに2倍にする)
+    is_running: bool                    # 監視中かどうか
+    def __init__(self, session: NFCStatusChangeSession, reader: str) -> None:
+        super(NFCReaderWorker, self).__init__()
+        self.session = session
+        self.reader = reader
+        self._thread = None
+        self._lock = threading.Lock()
+        self._hcontext = None
+        self._stop_event = threading.Event()
+        self._retry_interval = DEFAULT_TIMEOUT_NFC_RETRY
+        self.is_running = False
+
+    # 監視のスレッドが終了しているかどうか (NFCリーダーが切断された場合など)
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # 監視を開始するメソッド
+    def start(self) -> None:
+        if not self.is_running:
+            self.is_running = True
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._wait_status_change_loop, name=f'NFCReaderWorker-Thread ({self.reader})', daemon=True)
+            self._thread.start()
+
+    # 監視を停止するメソッド (待機中のSCardGetStatusChangeを中断し, スレッドが終了するまで中断を繰り返す)
+    def stop(self) -> None:
+        self.is_running = False
+        self._stop_event.set()
+        _cancel_until_stopped(self._thread, self._lock, lambda: self._hcontext)
+
+    # 監視が停止されるか, NFCリーダーが切断されるまでNFCタグの到着を待機するメソッド
+    # (PC/SCのエラーの場合はコンテキストを作り直し, 待機時間を延ばしながら再試行する)
+    def _wait_status_change_loop(self) -> None:
+        while self.is_running:
+            hresult, hcontext = SCardEstablishContext(SCARD_SCOPE_USER)
+            if hresult != SCARD_S_SUCCESS:
+                self.session._put_error(Exception(SCardGetErrorMessage(hresult)), reader=self.reader)
+            else:
+                with self._lock:
+                    self._hcontext = hcontext
+                try:
+                    # 中断された場合やNFCリーダーが切断された場合は終了する
+                    self._wait_status_change(hcontext)
+                    return
+                except Exception as e:
+                    self.session._put_error(e, reader=self.reader)
+                finally:
+                    with self._lock:
+                        self._hcontext = None
+                    SCardReleaseContext(hcontext)
+
+            # 少し待ってから再試行 (エラーが続く場合は待機時間を延ばす)
+            self._stop_event.wait(self._retry_interval)
+            self._retry_interval = min(self._retry_interval * 2, DEFAULT_TIMEOUT_NFC_RETRY_MAX)
+
+    # NFCリーダーの状態の変化を待機し, NFCタグが置かれた時にUIDを読み取るメソッド (中断された場合やNFCリーダーが切断された場合は戻り, PC/SCのエラーの場合は例外を送出する)
+    def _wait_status_change(self, hcontext: int) -> None:
+        reader_state: int = SCARD_STATE_UNAWARE
+        while self.is_running:
+            hresult, new_states = SCardGetStatusChange(hcontext, INFINITE, [(self.reader, reader_state)])
+            if hresult == SCARD_E_CANCELLED:
+                return
+            if hresult != SCARD_S_SUCCESS:
+                raise Exception(SCardGetErrorMessage(hresult))
+            _, event_state, _ = new_states[0]
+
+            # 状態を取得できた場合は再試行の待機時間を元に戻す
+            self._retry_interval = DEFAULT_TIMEOUT_NFC_RETRY
+
+            # NFCリーダーが切断された場合
+            if event_state & (SCARD_STATE_UNKNOWN | SCARD_STATE_IGNORE):
+                return
+
+            # NFCタグが新しく置かれた場合, UIDを読み取る
+            if event_state & SCARD_STATE_PRESENT and not event_state & SCARD_STATE_MUTE and not reader_state & SCARD_STATE_PRESENT:
+                self._read_uid(hcontext)
+            reader_state = event_state & ~SCARD_STATE_CHANGED
+
+    # NFCタグに接続してUIDを読み取るメソッド (読み取る前にNFCタグが離された場合は無視)
+    def _read_uid(self, hcontext: int) -> None:
+        hresult, hcard, protocol = SCardConnect(hcontext, self.reader, SCARD_SHARE_SHARED, SCARD_PROTOCOL_T0 | SCARD_PROTOCOL_T1)
+        if hresult == SCARD_W_REMOVED_CARD:
+            return
+        if hresult != SCARD_S_SUCCESS:
+            self.session._put_error(Exception(SCardGetErrorMessage(hresult)), reader=self.reader)
+            return
+        try:
+            hresult, response = SCardTransmit(hcard, protocol, COMMAND_GET_UID)
+            if hresult == SCARD_W_REMOVED_CARD:
+                return
+            if hresult != SCARD_S_SUCCESS:
+                self.session._put_error(Exception(SCardGetErrorMessage(hresult)), reader=self.reader)
+                return
+            if len(response) < 2:
+                return
+
+            # UIDの取得に成功した場合
+            data, sw1, sw2 = response[:-2], response[-2], response[-1]
+            if sw1 == 0x90 and sw2 == 0x00:
+                self.session._put_uid(UID(toHexString(data).replace(' ', '')), reader=self.reader)
+        finally:
+            SCardDisconnect(hcard, SCARD_LEAVE_CARD)
+
+# PC/SCのコンテキストでの待機を中断し, スレッドが終了するまで待機する (中断した後に待機を始めた場合に備えて, 中断を繰り返す)
+def _cancel_until_stopped(thread: threading.Thread | None, lock: threading.Lock, get_hcontext: Callable[[], int | None]) -> None:
+    while thread is not None and thread.is_alive() and thread is not threading.current_thread():
+        with lock:
+            hcontext: int | None = get_hcontext()
+            if hcontext is not None:
+                SCardCancel(hcontext)
+        thread.join(timeout=DEFAULT_TIMEOUT_NFC_WAIT)
+
+# PC/SCの状態変化の通知でNFCタグの到着を待機するNFCセッションのクラス
+# NFCリーダーの接続・切断をPnP通知で待機し, 接続されている全てのNFCリーダーでそれぞれNFCReaderWorkerを実行する
+# 待機中はSCardGetStatusChangeでブロックするため, NFCタグがない間はスレッドが起動しない (停止時はSCardCancelで待機を中断する)
+class NFCStatusChangeSession(NFCSession):
+    _lock: threading.Lock                   # PC/SCのコンテキストを参照するためのロック
+    _hcontext: int | None                   # PC/SCのコンテキスト (待機中のみ)
+    workers: dict[str, NFCReaderWorker]     # NFCリーダーごとの監視 (キー: NFCリーダーの名前)
+    def __init__(self, responses: queue.Queue[NFCResponse | None], response: NFCResponse | None = None) -> None:
+        super(NFCStatusChangeSession, self).__init__(responses=responses, response=response)
+        self._lock = threading.Lock()
+        self._hcontext = None
+        self.workers = dict[str, NFCReaderWorker]()
+
+    # NFCセッションを停止するメソッド (NFCリーダーの一覧の監視を中断し, 各NFCリーダーの監視はスレッドの終了時に停止する)
+    def stop(self) -> None:
+        if self.is_running:
+            self.is_running = False
+            self._stop_event.set()
+            _cancel_until_stopped(self._session, self._lock, lambda: self._hcontext)
+
+    # NFCセッションが停止されるまでPC/SCのコンテキストを作成し, NFCリーダーの接続・切断を監視するメソッド
+    def _read_uid_loop(self) -> None:
+        try:
+            while self.is_running:
+                # PC/SCのコンテキストを作成 (失敗した場合は少し待ってから再試行)
+                hresult, hcontext = SCardEstablishContext(SCARD_SCOPE_USER)
+                if hresult != SCARD_S_SUCCESS:
+                    self._put_error(Exception(SCardGetErrorMessage(hresult)))
+                    self._stop_event.wait(DEFAULT_TIMEOUT_NFC_RETRY)
+                    continue
+                with self._lock:
+                    self._hcontext = hcontext
+                try:
+                    self._wait_readers_change_loop(hcontext)
+                except Exception as e:
+                    self._put_error(e)
+                    self._stop_event.wait(DEFAULT_TIMEOUT_NFC_RETRY)
+                finally:
+                    with self._lock:
+                        self._hcontext = None
+                    SCardReleaseContext(hcontext)
+
+        # 各NFCリーダーの監視を停止
+        finally:
+            for worker in self.workers.values():
+                worker.stop()
+            self.workers = dict[str, NFCReaderWorker]()
+
+    # NFCリーダーの接続・切断を待機し, 各NFCリーダーの監視を開始・停止するメソッド (PC/SCのエラーが発生した場合は終了する)
+    def _wait_readers_change_loop(self, hcontext: int) -> None:
+        pnp_state: int | None = SCARD_STATE_UNAWARE     # PnP通知の状態 (PnP通知を使用できない場合はNone)
+        while self.is_running:
+            self._update_workers(hcontext)
+
+            # PnP通知を使用できない場合は一定時間ごとにNFCリーダーの一覧を取得し直す
+            if pnp_state is None:
+                self._stop_event.wait(DEFAULT_READER_RESCAN_INTERVAL)
+                continue
+
+            # NFCリーダーが接続・切断されるまで待機 (一定時間ごとに戻り, 終了したNFCリーダーの監視を再開する)
+            hresult, new_states = SCardGetStatusChange(hcontext, int(DEFAULT_WORKER_CHECK_INTERVAL * 1000), [(PNP_NOTIFICATION_READER, pnp_state)])
+            if hresult == SCARD_E_CANCELLED:
+                return
+            if hresult == SCARD_E_TIMEOUT:
+                continue
+            if hresult != SCARD_S_SUCCESS:
+                raise Exception(SCardGetErrorMessage(hresult))
+            _, event_state, _ = new_states[0]
+            pnp_state = None if event_state & SCARD_STATE_UNKNOWN else event_state & ~SCARD_STATE_CHANGED
+
+    # 接続されているNFCリーダーの一覧に合わせて, 各NFCリーダーの監視を開始・停止するメソッド
+    def _update_workers(self, hcontext: int) -> None:
+        hresult, reader_names = SCardListReaders(hcontext, [])
+        if hresult == SCARD_E_NO_READERS_AVAILABLE:
+            reader_names = list[str]()
+        elif hresult != SCARD_S_SUCCESS:
+            raise Exception(SCardGetErrorMessage(hresult))
+
+        # 切断されたNFCリーダーと, 監視が終了したNFCリーダーの監視を停止
+        for reader in list(self.workers.keys()):
+            if reader not in reader_names or not self.workers[reader].is_alive():
+                self.workers.pop(reader).stop()
+
+        # 新しく接続されたNFCリーダーの監視を開始
+        for reader in reader_names:
+            if reader not in self.workers:
+                self.workers[reader] = NFCReaderWorker(session=self, reader=reader)
+                self.workers[reader].start()
 
 # NFCを制御するためのクラス
+# 読み取りはNFCセッションのスレッドで行い, 読み取ったレスポンスをキューから取り出してメインスレッド (Tkのメインループ) でコマンドを実行する
 class NFC(object):
-    card_type: CardType                 # NFCカードのタイプ
-    card_request: CardRequest           # NFCカードリクエスト
-    command: Callable[[], None] | None  # NFCタグが読み取られたときに実行するコマンド
+    command: Callable[[], None] | None  # NFCタグが読み取られたときに実行するコマンド (メインスレッドで実行する)
     only_once: bool                     # 一度だけNFC読み取りを行うかどうか (Trueの場合は一度読み取ったら停止, Falseの場合は継続的に読み取る) (デフォルト: False)
-    session: threading.Thread | None    # 一度だけNFCを読み取るセッション
+    session: NFCSession | None          # NFCタグを読み取るセッション (NFCメインセッションの実行中のみ)
+    responses: queue.Queue[NFCResponse | None] # NFCセッションが読み取ったレスポンスのキュー (Noneは停止の通知)
+    _dispatcher: threading.Thread | None # キューからレスポンスを取り出してメインスレッドに受け渡すスレッド
     response: NFCResponse               # 最新のNFCのレスポンス情報
     is_running: bool                    # NFCメインセッションが実行中かどうか
     is_changed: bool                    # NFCタグの状態が変化したかどうか
     def __init__(self, command: Callable[[], None] | None = None, only_once: bool = False) -> None:
         super(NFC, self).__init__()
-        self.card_type = AnyCardType()
-        self.card_request = CardRequest(cardType=self.card_type, timeout=DEFAULT_TIMEOUT_NFC_WAIT)
         self.command = command
         self.only_once = only_once
         self.session = None
+        self.responses = queue.Queue[NFCResponse | None]()
+        self._dispatcher = None
         self.response = NFCResponse(
             status=None,
             uid=None,
@@ -160,50 +505,72 @@ class NFC(object):
     def start(self) -> None:
         if not self.is_running:
             self.is_running = True
-            self.session = threading.Thread(target=self._main_read_uid_loop, name='NFC-Main-Thread')
+
+            # 停止前に読み取ったレスポンスを処理しないよう, キューを作り直す
+            self.responses = queue.Queue[NFCResponse | None]()
+
+            # NFCセッションを開始 (前回のレスポンスを引き継ぐ)
+            session_class: type[NFCSession] = NFCStatusChangeSession if USE_STATUS_CHANGE_WAIT else NFCSession
+            self.session = session_class(responses=self.responses, response=self.response)
             self.session.start()
 
+            # レスポンスを処理するスレッドを開始
+            self._dispatcher = threading.Thread(target=self._main_read_uid_loop, args=(self.responses,), name='NFC-Main-Thread', daemon=True)
+            self._dispatcher.start()
+
     # NFCメインセッションのスレッドが終了するのを待機するメソッド
     def join(self) -> None:
         if self.session is not None:
             self.session.join()
+        if self._dispatcher is not None and self._dispatcher is not threading.current_thread():
+            self._dispatcher.join()
 
-    # NFCメインセッションを停止するメソッド
+    # NFCメインセッションを停止するメソッド (メインスレッドに受け渡し済みで未処理のレスポンスは破棄される)
     def stop(self) -> None:
         if self.is_running:
             self.is_running = False
             if self.session is not None:
-                self.session.join()
+                self.session.stop()
+                self.session = None
+            self.responses.put(None)
 
-    # NFCメインセッションのUID読み取りループ
-    def _main_read_uid_loop(self) -> None:
-        while self.is_running:
-            # 一度だけNFCを読み取るセッションを開始 (前回のレスポンスを引き継ぐ)
-            session: NFCSession = NFCSession(response=self.response)
-            session.start()
-            session.join()
+    # 同じUIDを無視するためのレスポンスを初期化するメソッド (直前と同じNFCタグをもう一度読み取るため)
+    def clear_response(self) -> None:
+        if self.session is not None:
+            self.session.clear_response()
 
-            # セッションの状態を更新
-            self.is_changed = session.is_changed
+    # NFCメインセッションのレスポンス処理ループ (キューからレスポンスを取り出してメインスレッドに受け渡す)
+    def _main_read_uid_loop(self, responses: queue.Queue[NFCResponse | None]) -> None:
+        while True:
+            response: NFCResponse | None = responses.get()
 
-            # 状態が変化していればレスポンスを更新
-            if self.is_changed:
-                self.response = session.response
+            # NFCメインセッションが停止された場合
+            if response is None or not self.is_running:
+                break
 
-            # UIDが正常に読み取られ、かつ状態が変化していればコマンドを実行
-            if self.response.status and self.is_changed:
-                if self.command is not None:
-                    self.command()
+            # メインスレッドでレスポンスを処理 (ワーカースレッドからウィジェットを操作しないため)
+            call_in_main_thread(self._deliver_response, responses, response)
 
-                # 一度だけ読み取りモードの場合、UIDが読み取られたらセッションを停止
-                if self.only_once:
-                    self.is_running = False
-                    break
+    # メインスレッドでレスポンスを更新し, コマンドを実行するメソッド
+    def _deliver_response(self, responses: queue.Queue[NFCResponse | None], response: NFCResponse) -> None:
+        # 受け渡した後にNFCメインセッションが停止 (または再開) された場合は破棄
+        if not self.is_running or responses is not self.responses:
+            return
 
-    # NFCリーダーが接続されているかどうかを確認するメソッド
-    def is_connected(self) -> bool:
-        # 利用可能なリーダーの一覧を取得
-        available_readers: list[str] = readers()
+        # レスポンスを更新
+        self.response = response
+        self.is_changed = True
 
+        # UIDが正常に読み取られた場合はコマンドを実行
+        if self.response.status:
+            if self.command is not None:
+                self.command()
+
+            # 一度だけ読み取りモードの場合、UIDが読み取られたらセッションを停止
+            if self.only_once:
+                self.stop()
+
+    # NFCリーダーが接続されているかどうかを確認するメソッド (NFCリーダーの監視の結果を返すため, 呼び出し元のスレッドでreaders()を呼び出さない)
+    def is_connected(self) -> bool:
         # リーダーが一つ以上存在すれば接続されていると判断
-        return len(available_readers) > 0
\ No newline at end of file
+        return len(get_connected_readers()) > 0
@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import Iterable, Iterator
+import csv
+import sqlite3
+import datetime
+from ._utils import UserAction
+from ._db import connection_db, get_sql
+
+# 滞在時間の集計で遡る期間 (日をまたぐ滞在を集計するため, 集計日の開始時刻より前の入室イベントも対象にする)
+REPORT_STAY_LOOKBACK: datetime.timedelta = datetime.timedelta(days=1)
+
+# 各レポートのCSVの列名
+DAILY_USER_REPORT_FIELDS: list[str] = ['day', 'user_id', 'name', 'total_seconds', 'first_in', 'last_out']
+WEEKLY_USER_REPORT_FIELDS: list[str] = ['week', 'user_id', 'name', 'total_seconds', 'days']
+HOURLY_OCCUPANCY_REPORT_FIELDS: list[str] = ['hour', 'peak']
+
+# 日ごとの集計を作成する (締め済みの日はキャッシュを使い, 当日は毎回集計し直す)
+def _build_daily_report(root_dir: str, day: datetime.date, now: datetime.datetime) -> None:
+    connection: sqlite3.Connection = connection_db()
+
+    # 締め済みの日の集計がある場合は何もしない
+    res: sqlite3.Row | None = connection.execute(get_sql(root_dir, 'select_report_day'), {'day': day}).fetchone()
+    if res is not None and res[1]:
+        return
+
+    day_start: datetime.datetime = datetime.datetime.combine(day, datetime.time())
+    day_end: datetime.datetime = min(day_start + datetime.timedelta(days=1), now)
+    is_closed: bool = day_start + datetime.timedelta(days=1) <= now
+
+    with connection:
+        # ユーザーごとの滞在時間, 最初の入室時刻, 最後の退室時刻の集計
+        connection.execute(get_sql(root_dir, 'delete_from_daily_user_reports_where_day'), {'day': day})
+        connection.execute(get_sql(root_dir, 'insert_daily_user_reports'), {
+            'day': day,
+            'window_start': day_start - REPORT_STAY_LOOKBACK,
+            'day_start': day_start,
+            'day_end': day_end,
+            'enter': UserAction.ENTER,
+            'exit': UserAction.EXIT
+        })
+
+        # 1時間ごとの最大在室人数の集計 (日の開始時点の在室人数に, イベントごとの増減を順に加える)
+        connection.execute(get_sql(root_dir, 'delete_from_hourly_occupancy_reports_where_day'), {'day': day})
+        occupancy: int = connection.execute(get_sql(root_dir, 'select_occupancy_at'), {'at': day_start, 'enter': UserAction.ENTER}).fetchone()[0]
+        peaks: list[int] = [occupancy] * 24
+        changes: sqlite3.Cursor = connection.execute(get_sql(root_dir, 'select_occupancy_changes'), {
+            'day_start': day_start,
+            'day_end': day_end,
+            'enter': UserAction.ENTER
+        })
+        hour: int = 0
+        current: int = occupancy
+        for created_at, step in changes:
+            event_hour: int = int(created_at[11:13])
+
+            # イベントのない時間帯は直前の在室人数を引き継ぐ
+            while hour < event_hour:
+                hour += 1
+                peaks[hour] = current
+            # 記録の欠落で負にならないよう, 1イベントごとに0で下限を取る
+            current = max(current + step, 0)
+            peaks[hour] = max(peaks[hour], current)
+        while hour < 23:
+            hour += 1
+            peaks[hour] = current
+
+        # 集計済みの時間帯のみ保存する (当日の未来の時間帯は保存しない)
+        connection.executemany(get_sql(root_dir, 'insert_hourly_occupancy_report'), [
+            {'hour': day_start + datetime.timedelta(hours=_hour), 'day': day, 'peak': peak}
+            for _hour, peak in enumerate(peaks) if day_start + datetime.timedelta(hours=_hour) < day_end
+        ])
+
+        # 集計した日を記録
+        connection.execute(get_sql(root_dir, 'upsert_report_day'), {'day': day, 'is_closed': is_closed, 'created_at': now})
+
+# 指定期間の日ごとの集計を作成する (未来の日は集計しない)
+def build_reports(root_dir: str, start: datetime.date, end: datetime.date) -> bool:
+    try:
+        now: datetime.datetime = datetime.datetime.now()
+        day: datetime.date = start
+        while day <= min(end, now.date()):
+            _build_daily_report(root_dir, day, now)
+            day += datetime.timedelta(days=1)
+
+    # 集計に失敗した場合はFalseを返す
+    except Exception as e:
+        return False
+
+    return True
+
+# 集計結果を1行ずつ辞書型で返す (全ての行をメモリに読み込まないため)
+def _iter_report(root_dir: str, name: str, fields: list[str], start: datetime.date, end: datetime.date) -> Iterator[dict[str, object]]:
+    build_reports(root_dir, start, end)
+    cursor: sqlite3.Cursor = connection_db().execute(get_sql(root_dir, name), {'start': start, 'end': end})
+    for row in cursor:
+        yield dict(zip(fields, row))
+
+# ユーザーごと・日ごとの滞在時間 (秒), 最初の入室時刻, 最後の退室時刻を取得する
+def iter_daily_user_report(root_dir: str, start: datetime.date, end: datetime.date) -> Iterator[dict[str, object]]:
+    return _iter_report(root_dir, 'select_daily_user_reports', DAILY_USER_REPORT_FIELDS, start, end)
+
+# ユーザーごと・週ごとの滞在時間 (秒) を取得する
+def iter_weekly_user_report(root_dir: str, start: datetime.date, end: datetime.date) -> Iterator[dict[str, object]]:
+    return _iter_report(root_dir, 'select_weekly_user_reports', WEEKLY_USER_REPORT_FIELDS, start, end)
+
+# 1時間ごとの最大在室人数を取得する
+def iter_hourly_occupancy_report(root_dir: str, start: datetime.date, end: datetime.date) -> Iterator[dict[str, object]]:
+    return _iter_report(root_dir, 'select_hourly_occupancy_reports', HOURLY_OCCUPANCY_REPORT_FIELDS, start, end)
+
+# 集計結果をCSVファイルに1行ずつ書き出す
+def export_report_csv(path: str, rows: Iterable[dict[str, object]], fields: list[str]) -> bool:
+    try:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer: csv.DictWriter = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+
+    # 書き出しに失敗した場合はFalseを返す
+    except Exception as e:
+        return False
+
+    return True
@@ -1,20 +1,21 @@
 from __future__ import annotations
-from typing import Literal
+from typing import TYPE_CHECKING, Literal, Callable, Iterable
 import os
 import enum
-import certifi
+import time
+import hashlib
+import random
+import threading
+import functools
 import keyring
 from urllib.parse import urlparse
-from slack_bolt import App as SlackApp
-from slack_sdk.web import SlackResponse
-from slack_sdk.errors import SlackApiError
 from ..utils import UserState, USER_STATE_LABELS
-from ..core import get_service
+from ..core import get_service, get_data_dir
 from ..utils.db import get_users_by_state
-
-# SSL証明書のパスを設定
-os.environ['SSL_CERT_FILE'] = certifi.where()
-os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
+from ..utils.bus import subscribe, unsubscribe, publish, call_in_main_thread, UserEvent, SlackTokensChanged
+if TYPE_CHECKING:
+    from slack_sdk import WebClient
+    from slack_sdk.web import SlackResponse
 
 # SlackのセットアップについてのドキュメントURL
 SLACK_SETUP_DOCUMENT_URL: str = 'https://github.com/fumito100111/ImIn/blob/main/docs/SLACK_SETUP.md'
@@ -22,131 +23,669 @@ SLACK_SETUP_DOCUMENT_URL: str = 'https://github.com/fumito100111/ImIn/blob/main/
 # Slackのボットトークンのスコープ説明文
 SLACK_BOT_TOKEN_SCOPES_DESCRIPTION: str = '※ \'files:read\', \'canvases:write\'の権限が必要です.'
 
+# Slackのトークンの検証で, Slackとの通信を待機する最大時間 (秒)
+SLACK_TOKEN_VALIDATION_TIMEOUT: float = 10.0
+
+# キャンバスの同期で使うクライアントの, Slackとの通信を待機する最大時間 (秒, slack_sdkの既定値の30秒は長すぎるため)
+SLACK_CLIENT_TIMEOUT: float = 10.0
+
+# Slackのキャンバスの同期設定 (短時間に集中したユーザー情報の変化をまとめて1回の更新にする)
+SLACK_CANVAS_SYNC_WINDOW: float = 2.0       # 最初の変化から更新するまでに待機する時間 (秒)
+SLACK_CANVAS_SYNC_RETRY_BASE: float = 2.0   # 更新に失敗した場合の最初の再試行までの待機時間 (秒, 失敗するごとに2倍にする)
+SLACK_CANVAS_SYNC_RETRY_MAX: float = 300.0  # 再試行までの最大の待機時間 (秒)
+
+# キャンバスに反映していない変化があることを記録するファイル (アプリケーションを再起動しても最新の状態を反映するため)
+SLACK_CANVAS_DIRTY_PATH: str = f'{get_data_dir()}/slack/canvas.dirty'
+
+# 最後にキャンバスに反映した内容のフィンガープリントを記録するファイル (再起動後も同じ内容を反映し直さないため)
+SLACK_CANVAS_FINGERPRINT_PATH: str = f'{get_data_dir()}/slack/canvas.fingerprint'
+
+# Slack APIのURL (テスト時にローカルの偽のSlackサーバーに接続する場合は環境変数で指定する. 指定がない場合はNoneでslack_sdkのデフォルト)
+SLACK_API_BASE_URL: str | None = os.environ.get('SLACK_API_BASE_URL')
+
+# トークンを検証し直すSlack APIのエラー (トークンが無効になった場合)
+SLACK_AUTH_ERRORS: set[str] = {'invalid_auth', 'not_authed', 'token_revoked', 'token_expired', 'account_inactive'}
+
+# Slackのキャンバスの更新結果を表す列挙型
+class SlackCanvasUpdateStatus(enum.IntEnum):
+    SUCCESS: int = 0                # 更新に成功した
+    RETRY: int = enum.auto()        # 一時的なエラーで失敗した (時間をおいて再試行する)
+    UNAUTHORIZED: int = enum.auto() # トークンが登録されていない, または無効 (トークンが保存されるまで再試行しない)
+
 # Slackのトークンの種類を定義する列挙型
 class SlackTokens(enum.IntEnum):
     SLACK_BOT_TOKEN: int = 0
     SLACK_CANVAS_ID: int = enum.auto()
 
+# キーリングに保存したSlackのトークンをメモリ上に保持するクラス
+# キーリングからは最初に使う時に1度だけ読み込み (OSの秘密情報の保存先へのアクセスは遅いため), 保存・削除時はキーリングと同時に更新する
+class SlackCredentialStore(object):
+    _lock: threading.Lock
+    _tokens: dict[SlackTokens, str | None] | None   # トークンの種類ごとのトークン (登録されていない場合はNone, 読み込み前はNone)
+    def __init__(self) -> None:
+        super(SlackCredentialStore, self).__init__()
+        self._lock = threading.Lock()
+        self._tokens = None
+
+    # トークンを取得する (登録されていないトークンはNone)
+    def get(self) -> dict[SlackTokens, str | None]:
+        with self._lock:
+            if self._tokens is None:
+                service: str = get_service()
+                self._tokens = {token: keyring.get_password(service, token.name) for token in sorted(SlackTokens)}
+            return dict(self._tokens)
+
+    # トークンを保存する
+    def save(self, tokens: dict[SlackTokens, str]) -> None:
+        with self._lock:
+            service: str = get_service()
+            for key, token in tokens.items():
+                keyring.set_password(service, key.name, token)
+                if self._tokens is not None:
+                    self._tokens[key] = token
+
+    # トークンを削除する
+    def delete(self, tokens: Iterable[SlackTokens]) -> None:
+        with self._lock:
+            service: str = get_service()
+            for key in tokens:
+                keyring.delete_password(service, key.name)
+                if self._tokens is not None:
+                    self._tokens[key] = None
+
+    # 保持しているトークンを破棄する (次回の取得時にキーリングから読み込み直す)
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tokens = None
+
+# アプリケーション全体で共有するSlackのトークン
+_slack_credential_store: SlackCredentialStore = SlackCredentialStore()
+
 # Slackのトークンが登録されているか確認する
 def is_registered_slack_tokens() -> bool:
-    service: str = get_service()
-    for token in sorted(SlackTokens):
-        if keyring.get_password(service, token.name) is None:
-            return False
-    return True
+    return all(token is not None for token in _slack_credential_store.get().values())
 
-# Slackのトークンが有効か確認する
-def is_valid_slack_tokens(bot_token: str, canvas_id: str) -> bool:
-    # Canvas IDがURL形式の場合はID部分を抽出する
+# Canvas IDがURL形式の場合はID部分を抽出する
+def _normalize_canvas_id(canvas_id: str) -> str:
     if '/' in canvas_id:
         canvas_id = os.path.basename(urlparse(canvas_id).path)
+    return canvas_id
 
-    # Slackとの接続を試みる
-    try:
-        # Slackアプリを初期化する
-        slack_app: SlackApp = SlackApp(token=bot_token)
+# SSL証明書のパスを設定する (certifiとslack_sdkは読み込みに時間がかかるため, 最初にSlackと通信する時に1度だけ読み込む)
+@functools.lru_cache(maxsize=None)
+def _configure_ssl_cert() -> None:
+    import certifi
+    os.environ['SSL_CERT_FILE'] = certifi.where()
+    os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
 
+# Slackのクライアントを作成する
+def _create_slack_client(token: str, timeout: float | None = None) -> WebClient:
+    _configure_ssl_cert()
+    from slack_sdk import WebClient
+    kwargs: dict[str, object] = dict[str, object]()
+    if SLACK_API_BASE_URL is not None:
+        kwargs['base_url'] = SLACK_API_BASE_URL
+    if timeout is not None:
+        kwargs['timeout'] = int(timeout)
+    return WebClient(token=token, **kwargs)
+
+# Slackとの通信に使うモジュールを読み込んでおく (起動後にバックグラウンドで呼び出し, 最初の通信を待たせないため)
+def preload_slack_modules() -> None:
+    _configure_ssl_cert()
+    import slack_sdk
+    import slack_sdk.errors
+
+# Slackのクライアントでキャンバスの情報を取得し, トークンが有効か確認する (通信エラーなどで確認できなかった場合はNone)
+def _check_slack_tokens(client: WebClient, canvas_id: str) -> bool | None:
+    from slack_sdk.errors import SlackApiError
+    try:
         # Canvasの情報を取得する
-        response: SlackResponse = slack_app.client.files_info(file=canvas_id)
+        response: SlackResponse = client.files_info(file=canvas_id)
 
         # 接続が成功した場合は有効とする
-        return response['ok']
+        return bool(response['ok'])
 
     # Slack APIエラーが発生した場合は無効とする
     except SlackApiError as e:
         return False
 
-    # その他の例外が発生した場合は無効とする
+    # その他の例外が発生した場合は確認できなかったとする
     except Exception as e:
-        return False
+        return None
+
+# Slackのトークンが有効か確認する
+def is_valid_slack_tokens(bot_token: str, canvas_id: str, timeout: float = SLACK_TOKEN_VALIDATION_TIMEOUT) -> bool:
+    # Slackとの接続を試みる (確認できなかった場合は無効とする)
+    return bool(_check_slack_tokens(_create_slack_client(bot_token, timeout), _normalize_canvas_id(canvas_id)))
+
+# Slackのトークンの検証をバックグラウンドで行うクラス (通信中もメインループを止めないため)
+# 結果 (有効: True, 無効: False, 接続できなかった: None) はメインスレッドでコールバック関数に渡し, キャンセルした場合は渡さない
+class SlackTokenValidation(object):
+    bot_token: str
+    canvas_id: str
+    timeout: float                          # Slackとの通信のタイムアウト (秒)
+    _callback: Callable[[bool | None], None]
+    _is_cancelled: threading.Event          # キャンセルされたかどうか (通信は中断できないため, 結果を渡さないようにする)
+    _thread: threading.Thread
+    def __init__(self, bot_token: str, canvas_id: str, callback: Callable[[bool | None], None], timeout: float = SLACK_TOKEN_VALIDATION_TIMEOUT) -> None:
+        super(SlackTokenValidation, self).__init__()
+        self.bot_token = bot_token
+        self.canvas_id = canvas_id
+        self.timeout = timeout
+        self._callback = callback
+        self._is_cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._validate, name='SlackTokenValidation-Thread', daemon=True)
+        self._thread.start()
+
+    # 検証をキャンセルする (メインスレッドから呼び出す)
+    def cancel(self) -> None:
+        self._is_cancelled.set()
+
+    # キャンセルされたかどうか
+    def is_cancelled(self) -> bool:
+        return self._is_cancelled.is_set()
+
+    # Slackとの接続を試み, 結果をメインスレッドに渡す
+    def _validate(self) -> None:
+        client: WebClient = _create_slack_client(self.bot_token, self.timeout)
+        is_valid: bool | None = _check_slack_tokens(client, _normalize_canvas_id(self.canvas_id))
+        if not self.is_cancelled():
+            call_in_main_thread(self._deliver, is_valid)
+
+    # 結果をコールバック関数に渡す (メインスレッドで実行するまでの間にキャンセルされた場合は渡さない)
+    def _deliver(self, is_valid: bool | None) -> None:
+        if not self.is_cancelled():
+            self._callback(is_valid)
 
-# Slackのトークンを保存する
+# Slackのトークンの検証をバックグラウンドで開始する
+def validate_slack_tokens_async(bot_token: str, canvas_id: str, callback: Callable[[bool | None], None], timeout: float = SLACK_TOKEN_VALIDATION_TIMEOUT) -> SlackTokenValidation:
+    return SlackTokenValidation(bot_token, canvas_id, callback, timeout)
+
+# Slackのトークンを保存する (保存後は保持しているクライアントを破棄し, 次回の更新時に検証し直す)
 def save_slack_tokens(tokens: dict[SlackTokens, str]) -> None:
-    service: str = get_service()
-    for key, token in tokens.items():
-        if key == SlackTokens.SLACK_CANVAS_ID:
-            # Canvas IDがURL形式の場合はID部分を抽出する
-            if '/' in token:
-                token = os.path.basename(urlparse(token).path)
-        keyring.set_password(service, key.name, token)
+    # Canvas IDがURL形式の場合はID部分を抽出する
+    _slack_credential_store.save({
+        key: _normalize_canvas_id(token) if key == SlackTokens.SLACK_CANVAS_ID else token
+        for key, token in tokens.items()
+    })
+    _slack_client_holder.invalidate()
+
+    # トークンの変化を通知する
+    publish(SlackTokensChanged(is_registered=is_registered_slack_tokens()))
+
+    # 同期中の場合, 新しいトークンでキャンバスを更新する (トークンが無効で反映できなかった変化を反映するため)
+    if _slack_canvas_sync_worker is not None:
+        _slack_canvas_sync_worker.mark_dirty()
 
 # Slackのトークンを取得する
 def get_slack_tokens() -> dict[SlackTokens, str]:
-    service: str = get_service()
-    tokens: dict[SlackTokens, str] = dict[SlackTokens, str]()
-    for key in sorted(SlackTokens):
-        token: str | None = keyring.get_password(service, key.name)
-        tokens[key] = token if token is not None else ''
-    return tokens
+    return {key: token if token is not None else '' for key, token in _slack_credential_store.get().items()}
 
 # Slackのトークンを削除する
 def delete_slack_tokens(tokens: dict[SlackTokens, str]) -> None:
-    service: str = get_service()
-    for key in tokens.keys():
-        keyring.delete_password(service, key.name)
+    _slack_credential_store.delete(tokens.keys())
+    _slack_client_holder.invalidate()
 
-# Slackのキャンバスを置き換える
-def replace_slack_canvas(content: str) -> bool:
-    service: str = get_service()
-    # Slackトークンが登録されていない場合はFalseを返す
-    if not is_registered_slack_tokens():
-        return False
+    # トークンの変化を通知する
+    publish(SlackTokensChanged(is_registered=is_registered_slack_tokens()))
 
-    # Slackトークンが無効な場合はFalseを返す
-    if not is_valid_slack_tokens(
-        get_slack_tokens()[SlackTokens.SLACK_BOT_TOKEN],
-        get_slack_tokens()[SlackTokens.SLACK_CANVAS_ID]
-    ):
-        return False
+# 検証済みのSlackのクライアントを保持するクラス
+# トークンはキーリングから1度だけ読み込んで1度だけ検証し, トークンの保存時や認証エラーの発生時のみ読み込み・検証し直す
+class SlackClientHolder(object):
+    _lock: threading.Lock
+    _client: WebClient | None       # 検証済みのクライアント (検証前, または無効な場合はNone)
+    _canvas_id: str                 # 連携済みのキャンバスのID
+    _is_valid: bool | None          # トークンが有効かどうか (未検証の場合はNone)
+    _generation: int                # 破棄した回数 (検証中に破棄された場合に, 古いトークンの検証結果を破棄するため)
+    def __init__(self) -> None:
+        super(SlackClientHolder, self).__init__()
+        self._lock = threading.Lock()
+        self._client = None
+        self._canvas_id = ''
+        self._is_valid = None
+        self._generation = 0
+
+    # 検証済みのクライアントとキャンバスのIDを取得する (トークンが登録されていない場合や無効な場合はNone)
+    # 検証の通信中はロックを保持しない (メインスレッドからのinvalidate()を待たせないため)
+    def get(self) -> tuple[WebClient, str] | None:
+        with self._lock:
+            if self._is_valid is not None:
+                return (self._client, self._canvas_id) if self._client is not None else None
+
+            # トークンが登録されていない場合 (登録されるまで検証しない)
+            if not is_registered_slack_tokens():
+                return None
+            tokens: dict[SlackTokens, str] = get_slack_tokens()
+            generation: int = self._generation
+
+        # トークンを検証 (確認できなかった場合は次回に検証し直す)
+        client: WebClient = _create_slack_client(tokens[SlackTokens.SLACK_BOT_TOKEN], SLACK_CLIENT_TIMEOUT)
+        canvas_id: str = _normalize_canvas_id(tokens[SlackTokens.SLACK_CANVAS_ID])
+        is_valid: bool | None = _check_slack_tokens(client, canvas_id)
+        if is_valid is None:
+            return None
+
+        with self._lock:
+            # 検証中にトークンが変更された場合は, 古いトークンの検証結果を破棄する (次回に新しいトークンで検証し直す)
+            if generation != self._generation:
+                return None
+            self._is_valid = is_valid
+            self._client = client if is_valid else None
+            self._canvas_id = canvas_id
+            return (self._client, self._canvas_id) if self._client is not None else None
+
+    # トークンを検証できていないかどうか (通信エラーなどで検証できなかった場合)
+    def is_unchecked(self) -> bool:
+        with self._lock:
+            return self._is_valid is None and is_registered_slack_tokens()
+
+    # 保持しているクライアントを破棄する (次回の取得時にトークンを読み込み, 検証し直す)
+    def invalidate(self) -> None:
+        with self._lock:
+            self._client = None
+            self._canvas_id = ''
+            self._is_valid = None
+            self._generation += 1
+
+# アプリケーション全体で共有するSlackのクライアント
+_slack_client_holder: SlackClientHolder = SlackClientHolder()
+
+# 保持しているSlackのクライアントを破棄する (トークンを読み込み, 検証し直すため)
+def invalidate_slack_client() -> None:
+    _slack_client_holder.invalidate()
+
+# Slackのキャンバスに表示するユーザー一覧の型 (キー: 在室状態, 値: ユーザー名の一覧 (更新日時の降順))
+SlackCanvasSections = dict[UserState, list[str]]
+
+# Slackのクライアントを取得できなかった場合の結果を求める (トークンを検証できなかった場合は再試行する)
+def _slack_client_unavailable_status() -> SlackCanvasUpdateStatus:
+    return SlackCanvasUpdateStatus.RETRY if _slack_client_holder.is_unchecked() else SlackCanvasUpdateStatus.UNAUTHORIZED
 
-    # 連携済みのSlackのキャンパスを置き換える.
+# Slack APIを呼び出し, 結果と再試行までの待機時間 (429エラーのRetry-Afterヘッダー, 指定がない場合はNone) とレスポンスを返す
+def _call_slack_api(request: Callable[[], SlackResponse]) -> tuple[SlackCanvasUpdateStatus, float | None, SlackResponse | None]:
+    from slack_sdk.errors import SlackApiError
     try:
-        # Slackトークンを取得する
-        tokens: dict[SlackTokens, str] = get_slack_tokens()
-
-        # Slackアプリを初期化する
-        slack_app: SlackApp = SlackApp(token=tokens[SlackTokens.SLACK_BOT_TOKEN])
-
-        # Canvasの内容を置き換える
-        response: SlackResponse = slack_app.client.canvases_edit(
-            canvas_id=tokens[SlackTokens.SLACK_CANVAS_ID],
-            changes=[{
-                'operation': 'replace',
-                'document_content': {
-                    'type': 'markdown',
-                    'markdown': content
-                }
-            }]
-        )
+        response: SlackResponse = request()
 
     except SlackApiError as e:
-        return False
+        # 認証エラーの場合はクライアントを破棄し, 次回の更新時に検証し直す
+        if e.response.get('error') in SLACK_AUTH_ERRORS:
+            _slack_client_holder.invalidate()
+            return SlackCanvasUpdateStatus.RETRY, None, None
+
+        # レート制限の場合はRetry-Afterヘッダーの時間だけ待機する
+        if e.response.status_code == 429:
+            retry_after: str | None = e.response.headers.get('Retry-After', e.response.headers.get('retry-after'))
+            return SlackCanvasUpdateStatus.RETRY, float(retry_after) if retry_after is not None and retry_after.isdigit() else None, None
+        return SlackCanvasUpdateStatus.RETRY, None, None
 
     except Exception as e:
-        return False
+        return SlackCanvasUpdateStatus.RETRY, None, None
+
+    return SlackCanvasUpdateStatus.SUCCESS, None, response
+
+# 連携済みのSlackのキャンバスの内容全体を置き換える (検証済みのクライアントを使い回すため, 1回のAPI呼び出しで置き換える)
+def _replace_slack_canvas_with(client: WebClient, canvas_id: str, content: str) -> tuple[SlackCanvasUpdateStatus, float | None]:
+    status, retry_after, _ = _call_slack_api(lambda: client.canvases_edit(
+        canvas_id=canvas_id,
+        changes=[{
+            'operation': 'replace',
+            'document_content': {
+                'type': 'markdown',
+                'markdown': content
+            }
+        }]
+    ))
+    return status, retry_after
+
+# Slackのキャンバスを置き換え, 結果と再試行までの待機時間を返す
+def _replace_slack_canvas(content: str) -> tuple[SlackCanvasUpdateStatus, float | None]:
+    # Slackトークンが登録されていない場合や無効な場合
+    slack_client: tuple[WebClient, str] | None = _slack_client_holder.get()
+    if slack_client is None:
+        return _slack_client_unavailable_status(), None
+    client, canvas_id = slack_client
+    return _replace_slack_canvas_with(client, canvas_id, content)
+
+# Slackのキャンバスを置き換える (キャンバスの内容が変わるため, 次回のデータベースからの更新では全体を置き換える)
+def replace_slack_canvas(content: str) -> bool:
+    _slack_canvas_publisher.reset()
+    status, _ = _replace_slack_canvas(content)
+    return status == SlackCanvasUpdateStatus.SUCCESS
+
+# データベースの情報をもとに, Slackのキャンバスに表示するユーザー一覧を作成する
+def _build_slack_canvas_sections(root_dir: str) -> SlackCanvasSections:
+    return {
+        state: [user['name'] for user in get_users_by_state(root_dir=root_dir, state=state)]
+        for state in (UserState.IN, UserState.OUT)
+    }
+
+# ユーザー一覧から, Slackのキャンバスの内容 (Markdown) を作成する
+def _render_slack_canvas_content(sections: SlackCanvasSections) -> str:
+    lines: list[str] = list[str]()
+    for i, (state, names) in enumerate(sections.items()):
+        # 前の状態のユーザー一覧との間に空行を入れる
+        if i > 0:
+            lines.extend(['', ''])
+        lines.append(f'## {USER_STATE_LABELS[state]}')
+        lines.extend(f'- {name}' for name in names)
+    return '\n'.join(lines) + '\n'
+
+# データベースの情報をもとに, Slackのキャンバスの内容を作成する
+def _build_slack_canvas_content(root_dir: str) -> str:
+    return _render_slack_canvas_content(_build_slack_canvas_sections(root_dir))
+
+# 前回と今回のユーザー一覧の差分を求める (削除するユーザー名, 先頭に追加する在室状態)
+# 1人のユーザーの移動・追加・削除のみの場合に求め, それ以外の場合はNoneを返す (どちらも変化がない場合は(None, None))
+def _diff_slack_canvas_sections(old: SlackCanvasSections, new: SlackCanvasSections) -> tuple[str | None, UserState | None] | None:
+    if old.keys() != new.keys():
+        return None
+
+    # いずれかの状態の先頭に追加されたユーザーを仮定し, 残りが前回から1人以下のユーザーを削除したものになるか確認する
+    for inserted in [None, *[state for state, names in new.items() if len(names) > 0]]:
+        remaining: SlackCanvasSections = {state: names[1:] if state == inserted else names for state, names in new.items()}
+        removed: str | None = None
+        for state, names in old.items():
+            if names == remaining[state]:
+                continue
+
+            # 1人を削除したものでなければ, この仮定では差分を求められない
+            if removed is not None or len(names) != len(remaining[state]) + 1:
+                break
+            i: int = next((i for i, (a, b) in enumerate(zip(names, remaining[state])) if a != b), len(remaining[state]))
+            if names[:i] + names[i + 1:] != remaining[state]:
+                break
+            removed = names[i]
+        else:
+            return removed, inserted
+    return None
+
+# 最後に反映したSlackのキャンバスの内容をもとに, 変化した部分のみをキャンバスに反映するクラス
+# 内容のフィンガープリント (ハッシュ値) が前回と同じ場合は反映せず, 1人のユーザーの移動・追加・削除のみの場合はセクション単位で編集する
+class SlackCanvasPublisher(object):
+    fingerprint_path: str                       # 最後に反映した内容のフィンガープリントを記録するファイルのパス
+    _lock: threading.Lock
+    _canvas_id: str                             # 最後に反映したキャンバスのID
+    _fingerprint: str | None                    # 最後に反映した内容のフィンガープリント (反映した内容が不明な場合はNone)
+    _sections: SlackCanvasSections | None       # 最後に反映したユーザー一覧 (キャンバスの内容が不明な場合はNone)
+    _header_ids: dict[UserState, str]           # 在室状態ごとの見出しのセクションID (全体を置き換えるまで使い回す)
+    def __init__(self, fingerprint_path: str = SLACK_CANVAS_FINGERPRINT_PATH) -> None:
+        super(SlackCanvasPublisher, self).__init__()
+        self.fingerprint_path = fingerprint_path
+        self._lock = threading.Lock()
+        self._canvas_id = ''
+        self._fingerprint = None
+        self._sections = None
+        self._header_ids = dict[UserState, str]()
+        self._load_fingerprint()
+
+    # 反映した内容を破棄する (次回は内容に関わらず全体を置き換える)
+    def reset(self) -> None:
+        with self._lock:
+            self._set_published('', None, None)
+
+    # データベースの情報をもとに, Slackのキャンバスに変化を反映し, 結果と再試行までの待機時間を返す
+    def publish(self, root_dir: str) -> tuple[SlackCanvasUpdateStatus, float | None]:
+        with self._lock:
+            sections: SlackCanvasSections = _build_slack_canvas_sections(root_dir)
+            content: str = _render_slack_canvas_content(sections)
+
+            # Slackトークンが登録されていない場合や無効な場合
+            slack_client: tuple[WebClient, str] | None = _slack_client_holder.get()
+            if slack_client is None:
+                return _slack_client_unavailable_status(), None
+            client, canvas_id = slack_client
+
+            # 前回と同じ内容の場合は反映しない
+            fingerprint: str = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            if canvas_id == self._canvas_id and fingerprint == self._fingerprint:
+                return SlackCanvasUpdateStatus.SUCCESS, None
+
+            # 変化した部分のみを反映する (反映できない場合は全体を置き換える)
+            if canvas_id == self._canvas_id and self._sections is not None:
+                status, retry_after = self._publish_diff(client, canvas_id, self._sections, sections)
+                if status is not None:
+                    if status == SlackCanvasUpdateStatus.SUCCESS:
+                        self._set_published(canvas_id, fingerprint, sections)
+                    return status, retry_after
+
+            # 全体を置き換える (見出しのセクションIDが変わるため破棄する)
+            self._header_ids.clear()
+            status, retry_after = _replace_slack_canvas_with(client, canvas_id, content)
+            if status == SlackCanvasUpdateStatus.SUCCESS:
+                self._set_published(canvas_id, fingerprint, sections)
+            return status, retry_after
+
+    # 前回からの差分をセクション単位の編集で反映する (差分を求められない場合やセクションを特定できない場合, 状態はNone)
+    def _publish_diff(self, client: WebClient, canvas_id: str, old: SlackCanvasSections, new: SlackCanvasSections) -> tuple[SlackCanvasUpdateStatus | None, float | None]:
+        diff: tuple[str | None, UserState | None] | None = _diff_slack_canvas_sections(old, new)
+        if diff is None:
+            return None, None
+        removed, inserted = diff
+
+        # 移動・削除したユーザーの行を削除する (同じ名前を含む行が複数ある場合は特定できない)
+        if removed is not None:
+            status, retry_after, response = _call_slack_api(lambda: client.canvases_sections_lookup(
+                canvas_id=canvas_id,
+                criteria={'contains_text': removed}
+            ))
+            if response is None:
+                return status, retry_after
+            section_ids: list[str] = [section['id'] for section in response.get('sections', [])]
+            if len(section_ids) != 1:
+                return None, None
+            status, retry_after, _ = _call_slack_api(lambda: client.canvases_edit(
+                canvas_id=canvas_id,
+                changes=[{
+                    'operation': 'delete',
+                    'section_id': section_ids[0]
+                }]
+            ))
+            if status != SlackCanvasUpdateStatus.SUCCESS:
+                return status, retry_after
 
-    return True
+            # 行の追加に失敗した場合に備え, キャンバスの内容を不明とする (次回は全体を置き換える)
+            self._sections = None
 
-# データベースの情報をもとに, Slackのキャンバスの内容を置き換える
+        # 移動・追加したユーザーの行を在室状態の見出しの直後に追加する
+        if inserted is not None:
+            if inserted not in self._header_ids:
+                status, retry_after, response = _call_slack_api(lambda: client.canvases_sections_lookup(
+                    canvas_id=canvas_id,
+                    criteria={'section_types': ['h2'], 'contains_text': USER_STATE_LABELS[inserted]}
+                ))
+                if response is None:
+                    return status, retry_after
+                section_ids = [section['id'] for section in response.get('sections', [])]
+                if len(section_ids) != 1:
+                    return None, None
+                self._header_ids[inserted] = section_ids[0]
+            status, retry_after, _ = _call_slack_api(lambda: client.canvases_edit(
+                canvas_id=canvas_id,
+                changes=[{
+                    'operation': 'insert_after',
+                    'section_id': self._header_ids[inserted],
+                    'document_content': {
+                        'type': 'markdown',
+                        'markdown': f'- {new[inserted][0]}\n'
+                    }
+                }]
+            ))
+            if status != SlackCanvasUpdateStatus.SUCCESS:
+                self._header_ids.pop(inserted, None)
+                return status, retry_after
+        return SlackCanvasUpdateStatus.SUCCESS, None
+
+    # 反映した内容を保持し, フィンガープリントをファイルに記録する (記録できなかった場合は無視する)
+    def _set_published(self, canvas_id: str, fingerprint: str | None, sections: SlackCanvasSections | None) -> None:
+        self._canvas_id = canvas_id
+        self._fingerprint = fingerprint
+        self._sections = sections
+        try:
+            if fingerprint is None:
+                if os.path.exists(self.fingerprint_path):
+                    os.remove(self.fingerprint_path)
+            else:
+                os.makedirs(os.path.dirname(self.fingerprint_path), exist_ok=True)
+                with open(self.fingerprint_path, 'w', encoding='utf-8') as f:
+                    f.write(f'{canvas_id}\n{fingerprint}\n')
+        except Exception as e:
+            pass
+
+    # 前回の起動時に反映した内容のフィンガープリントを読み込む (ユーザー一覧は保存しないため, 変化があった場合は全体を置き換える)
+    def _load_fingerprint(self) -> None:
+        try:
+            with open(self.fingerprint_path, 'r', encoding='utf-8') as f:
+                canvas_id, fingerprint = f.read().split()
+            self._canvas_id = canvas_id
+            self._fingerprint = fingerprint
+        except Exception as e:
+            pass
+
+# アプリケーション全体で共有するSlackのキャンバスへの反映
+_slack_canvas_publisher: SlackCanvasPublisher = SlackCanvasPublisher()
+
+# データベースの情報をもとに, Slackのキャンバスの内容を更新する (前回から変化した部分のみを反映する)
 def update_slack_canvas_from_db(root_dir: str) -> bool:
-    service: str = get_service()
-    # ユーザー情報を取得する
-    in_users: list[dict[str, str]] = get_users_by_state(root_dir=root_dir, state=UserState.IN)
-    out_users: list[dict[str, str]] = get_users_by_state(root_dir=root_dir, state=UserState.OUT)
-
-    # Slackのキャンバスの内容を作成する
-    content: str = ''
-    # 在室ユーザー情報の追加
-    content += f'## {USER_STATE_LABELS[UserState.IN]}\n'
-    for user in in_users:
-        content += f'- {user['name']}\n'
-
-    content += '\n'
-
-    # 不在ユーザー情報の追加
-    content += f'\n## {USER_STATE_LABELS[UserState.OUT]}\n'
-    for user in out_users:
-        content += f'- {user['name']}\n'
-
-    # Slackのキャンバスを置き換える
-    return replace_slack_canvas(content=content)
\ No newline at end of file
+    status, _ = _slack_canvas_publisher.publish(root_dir)
+    return status == SlackCanvasUpdateStatus.SUCCESS
+
+# ユーザー情報の変化をまとめてSlackのキャンバスに反映するクラス
+# 1つのスレッドで順番に更新し, 変化から一定時間内の変化はまとめて1回の更新にする (更新時には最新のユーザー情報を反映する)
+# 更新に失敗した場合は指数関数的に待機時間を延ばして (ジッターあり) 再試行し, 反映していない変化はファイルに記録して再起動後に反映する
+class SlackCanvasSyncWorker(object):
+    root_dir: str
+    window: float                       # 最初の変化から更新するまでに待機する時間 (秒)
+    dirty_path: str                     # 反映していない変化があることを記録するファイルのパス
+    _condition: threading.Condition     # 変化の通知と停止の通知を待機するための条件変数
+    _is_dirty: bool                     # キャンバスに反映していない変化があるかどうか
+    _is_running: bool                   # 同期中かどうか
+    _retry_count: int                   # 連続して更新に失敗した回数
+    _thread: threading.Thread           # キャンバスを更新するスレッド
+    def __init__(self, root_dir: str, window: float = SLACK_CANVAS_SYNC_WINDOW, dirty_path: str = SLACK_CANVAS_DIRTY_PATH) -> None:
+        super(SlackCanvasSyncWorker, self).__init__()
+        self.root_dir = root_dir
+        self.window = window
+        self.dirty_path = dirty_path
+        self._condition = threading.Condition()
+        self._is_dirty = os.path.exists(self.dirty_path) # 前回の起動時に反映できなかった変化がある場合は反映する
+        self._is_running = True
+        self._retry_count = 0
+        self._thread = threading.Thread(target=self._sync_loop, name='SlackCanvasSync-Thread', daemon=True)
+        self._thread.start()
+
+    # キャンバスに反映していない変化があることを通知する (どのスレッドからでも呼び出せる)
+    def mark_dirty(self) -> None:
+        with self._condition:
+            self._is_dirty = True
+            self._condition.notify()
+
+    # 同期の停止を通知する (メインスレッドから呼び出すため, スレッドの終了は待機しない)
+    # 反映していない変化がある場合はファイルに記録してから通知し, スレッドは待機せずに反映を試みる (反映できなかった場合は次回の起動時に反映する)
+    def stop(self) -> None:
+        with self._condition:
+            self._is_running = False
+            if self._is_dirty:
+                self._persist_dirty(True)
+            self._condition.notify()
+
+    # 変化を待機し, まとめてキャンバスに反映するループ
+    def _sync_loop(self) -> None:
+        while True:
+            with self._condition:
+                # 変化があるか停止されるまで待機
+                while self._is_running and not self._is_dirty:
+                    self._condition.wait()
+
+                # 停止され, 反映していない変化がない場合は終了
+                if not self._is_dirty:
+                    return
+
+            # 反映していない変化があることをファイルに記録
+            self._persist_dirty(True)
+
+            with self._condition:
+                # 一定時間内の変化をまとめる (停止された場合はすぐに反映する)
+                self._wait(self.window)
+                self._is_dirty = False
+
+            # 最新のユーザー情報でキャンバスを更新
+            try:
+                status, retry_after = _slack_canvas_publisher.publish(self.root_dir)
+            except Exception as e:
+                status, retry_after = SlackCanvasUpdateStatus.RETRY, None
+
+            with self._condition:
+                # 更新に成功した場合, 更新中に新しい変化がなければ記録を削除
+                if status == SlackCanvasUpdateStatus.SUCCESS:
+                    self._retry_count = 0
+                    if not self._is_dirty:
+                        self._persist_dirty(False)
+
+                # 一時的なエラーの場合, 待機してから再試行 (停止された場合は記録を残したまま終了)
+                elif status == SlackCanvasUpdateStatus.RETRY:
+                    self._is_dirty = True
+                    if not self._is_running:
+                        return
+                    self._wait(self._retry_delay(retry_after))
+                    self._retry_count += 1
+                    if not self._is_running:
+                        return
+
+                # トークンが登録されていない, または無効な場合は記録を残し, 次の変化 (トークンの保存を含む) まで待機
+
+    # 停止されるまで, 指定した時間だけ待機する (条件変数のロックを取得した状態で呼び出す)
+    def _wait(self, duration: float) -> None:
+        deadline: float = time.monotonic() + duration
+        while self._is_running:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._condition.wait(remaining)
+
+    # 再試行までの待機時間を求める (失敗するごとに2倍にし, ジッターを加える. Retry-Afterヘッダーの指定がある場合はそれ以上待機する)
+    def _retry_delay(self, retry_after: float | None) -> float:
+        delay: float = min(SLACK_CANVAS_SYNC_RETRY_BASE * (2 ** self._retry_count), SLACK_CANVAS_SYNC_RETRY_MAX)
+        delay = random.uniform(delay / 2, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    # 反映していない変化があることをファイルに記録する (記録できなかった場合は無視する)
+    def _persist_dirty(self, is_dirty: bool) -> None:
+        try:
+            if is_dirty and not os.path.exists(self.dirty_path):
+                os.makedirs(os.path.dirname(self.dirty_path), exist_ok=True)
+                with open(self.dirty_path, 'w', encoding='utf-8') as f:
+                    f.write('')
+            elif not is_dirty and os.path.exists(self.dirty_path):
+                os.remove(self.dirty_path)
+        except Exception as e:
+            pass
+
+# Slackのキャンバスを同期するワーカーと, ユーザー情報の変化を購読するコールバック関数 (Slackのキャンバスの同期中のみ設定)
+_slack_canvas_sync_worker: SlackCanvasSyncWorker | None = None
+_slack_canvas_sync_callback: Callable[[UserEvent], None] | None = None
+
+# ユーザー情報の変化に応じて, Slackのキャンバスの同期を開始する (アプリケーションの起動時に使用)
+def start_slack_canvas_sync(root_dir: str) -> None:
+    global _slack_canvas_sync_worker, _slack_canvas_sync_callback
+    stop_slack_canvas_sync()
+
+    # ユーザー情報が変化した場合, Slackのキャンバスの更新を予約 (少し時間がかかるため, ワーカーのスレッドでまとめて実行)
+    worker: SlackCanvasSyncWorker = SlackCanvasSyncWorker(root_dir)
+    def _update_canvas(event: UserEvent) -> None:
+        worker.mark_dirty()
+    _slack_canvas_sync_worker = worker
+    _slack_canvas_sync_callback = _update_canvas
+    subscribe(UserEvent, _slack_canvas_sync_callback)
+
+# Slackのキャンバスの同期を停止する
+def stop_slack_canvas_sync() -> None:
+    global _slack_canvas_sync_worker, _slack_canvas_sync_callback
+    if _slack_canvas_sync_callback is not None:
+        unsubscribe(UserEvent, _slack_canvas_sync_callback)
+        _slack_canvas_sync_callback = None
+    if _slack_canvas_sync_worker is not None:
+        _slack_canvas_sync_worker.stop()
+        _slack_canvas_sync_worker = None